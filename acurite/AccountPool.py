@@ -0,0 +1,158 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import udi_interface
+
+from .AcuriteManager import AcuriteManager, BASE_URL
+from .AsyncAcuriteManager import AsyncAcuriteManager
+from .ReplayTransport import RecordingTransport, ReplayTransport
+
+LOGGER = udi_interface.LOGGER
+
+MAX_ACCOUNT_WORKERS = 4
+PRIMARY_ACCOUNT = 1
+
+
+class AccountPool():
+    """Keeps one cached AcuriteManager per account and fetches all accounts in parallel."""
+
+    def __init__(self, baseUrl=BASE_URL):
+        self.baseUrl = baseUrl
+        self.managers = {}
+        self.useAsync = False
+        self.fixtureMode = None
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=MAX_ACCOUNT_WORKERS, thread_name_prefix='acurite-account')
+
+    @staticmethod
+    def nodeAddress(accountNumber, deviceId):
+        # The primary account keeps the bare device id so nodes created before multi-account support survive
+        if accountNumber == PRIMARY_ACCOUNT:
+            return deviceId
+        return 'a{}_{}'.format(accountNumber, deviceId)
+
+    def isConfigured(self):
+        return len(self.managers) > 0
+
+    def createManager(self, accountNumber, user, password):
+        if self.fixtureMode is None:
+            if self.useAsync:
+                return AsyncAcuriteManager(user, password, baseUrl=self.baseUrl)
+            return AcuriteManager(user, password, baseUrl=self.baseUrl)
+
+        # Each account gets its own fixture directory so multi-account recordings don't overwrite each other
+        mode, fixtureDir = self.fixtureMode
+        transportClass = RecordingTransport if mode == 'record' else ReplayTransport
+        return AcuriteManager(user, password, transportClass(os.path.join(fixtureDir, str(accountNumber))))
+
+    def configure(self, credentials, connectTimeout, readTimeout, maxRetries, useAsync=False, fixtureMode=None):
+        """credentials maps account number to a (user, password) tuple.
+
+        fixtureMode is None for the live API, or ('record', dir) / ('replay', dir) to record or replay fixtures.
+        """
+        # Fixtures are always served by the sync manager, so async is off whenever a fixture mode is set
+        useAsync = useAsync and fixtureMode is None
+        with self.lock:
+            for accountNumber in list(self.managers):
+                manager = self.managers[accountNumber]
+                if credentials.get(accountNumber) != (manager.user, manager.password) or \
+                        useAsync != self.useAsync or fixtureMode != self.fixtureMode:
+                    manager.close()
+                    del self.managers[accountNumber]
+
+            self.useAsync = useAsync
+            self.fixtureMode = fixtureMode
+            for accountNumber, (user, password) in credentials.items():
+                if accountNumber not in self.managers:
+                    self.managers[accountNumber] = self.createManager(accountNumber, user, password)
+                self.managers[accountNumber].transport.configure(connectTimeout, readTimeout, maxRetries)
+
+    def getDevices(self):
+        with self.lock:
+            managers = sorted(self.managers.items())
+        if len(managers) == 0:
+            return None
+
+        futures = [(accountNumber, manager.user, self.executor.submit(manager.getHubDevices))
+                   for accountNumber, manager in managers]
+        results = []
+        for accountNumber, user, future in futures:
+            try:
+                results.append((accountNumber, user, future.result()))
+            except Exception as e:
+                LOGGER.error('AccountPool - Error getting devices for {}: {}'.format(user, e))
+                results.append((accountNumber, user, None))
+        return self.mergeAccountDevices(results)
+
+    async def getDevicesAsync(self):
+        with self.lock:
+            managers = sorted(self.managers.items())
+        if len(managers) == 0:
+            return None
+
+        accountResults = await asyncio.gather(*[manager.getHubDevicesAsync() for accountNumber, manager in managers],
+                                              return_exceptions=True)
+        results = []
+        for (accountNumber, manager), deviceRespJO in zip(managers, accountResults):
+            if isinstance(deviceRespJO, Exception):
+                LOGGER.error('AccountPool - Error getting devices for {}: {}'.format(manager.user, deviceRespJO))
+                deviceRespJO = None
+            results.append((accountNumber, manager.user, deviceRespJO))
+        return self.mergeAccountDevices(results)
+
+    def getHubDevices(self, accountNumber, hubId):
+        """Fetches a single hub of one account, returning a response scoped to that hub, or None on failure."""
+        with self.lock:
+            manager = self.managers.get(accountNumber)
+        if manager is None:
+            return None
+        return self.hubResponse(accountNumber, hubId, manager.getDevicesForHub(hubId))
+
+    async def getHubDevicesAsync(self, accountNumber, hubId):
+        """getHubDevices() for the async engine, so the refresh shares the login of the async polls."""
+        with self.lock:
+            manager = self.managers.get(accountNumber)
+        if manager is None:
+            return None
+        return self.hubResponse(accountNumber, hubId, await manager.getDevicesForHubAsync(hubId))
+
+    def hubResponse(self, accountNumber, hubId, hubDevices):
+        if hubDevices is None:
+            return None
+        devices = []
+        for device in hubDevices:
+            if device is not None:
+                device['account'] = accountNumber
+                device['address'] = self.nodeAddress(accountNumber, device['id'])
+                devices.append(device)
+        return {'devices': devices, 'failed_accounts': [], 'failed_hubs': [], 'hub': (accountNumber, hubId)}
+
+    def mergeAccountDevices(self, results):
+        """Merges (account number, user, device response or None) results, returning None when every account failed."""
+        devices = []
+        failedAccounts = []
+        failedHubs = []
+        for accountNumber, user, deviceRespJO in results:
+            if deviceRespJO is None:
+                LOGGER.error('No Response Returned from Acurite for {}'.format(user))
+                failedAccounts.append(accountNumber)
+                continue
+            failedHubs.extend((accountNumber, hubId) for hubId in deviceRespJO.get('failed_hubs', []))
+            for device in deviceRespJO['devices']:
+                if device is not None:
+                    device['account'] = accountNumber
+                    device['address'] = self.nodeAddress(accountNumber, device['id'])
+                    devices.append(device)
+
+        if len(failedAccounts) == len(results):
+            return None
+        return {'devices': devices, 'failed_accounts': failedAccounts, 'failed_hubs': failedHubs}
+
+    def close(self):
+        with self.lock:
+            for manager in self.managers.values():
+                manager.close()
+            self.managers.clear()
+        self.executor.shutdown(wait=False)
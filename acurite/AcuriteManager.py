@@ -1,68 +1,209 @@
 from datetime import datetime, timezone
 
 import udi_interface
-import requests
+import hashlib
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from enums import BatteryLevel, DeviceStatus
-from nodes import AcuriteDeviceNode
+from .AcuriteTransport import AcuriteTransport
+from .Metrics import METRICS
+from .LogUtil import LazyJson, debug
 
 LOGGER = udi_interface.LOGGER
 Custom = udi_interface.Custom
 
+BASE_URL = 'https://marapi.myacurite.com'
+
+# Acurite does not publish a token lifetime, so refresh well before it could plausibly expire
+TOKEN_MAX_AGE = 6 * 60 * 60
+AUTH_FAILURE_CODES = (401, 403)
+MAX_HUB_WORKERS = 4
+
 
 class AcuriteManager():
 
-    def __init__(self, user, password):
+    def __init__(self, user, password, transport=None, baseUrl=BASE_URL):
         self.user = user
         self.password = password
+        self.baseUrl = baseUrl
+        self.transport = transport if transport is not None else AcuriteTransport()
+        self.tokenId = None
+        self.accountId = None
+        self.tokenTime = 0
+        self.tokenLock = threading.Lock()
+        self.hubCache = {}
+        self.fingerprints = {}
+        self.fingerprintChecks = 0
+        self.fingerprintHits = 0
+        self.fingerprintLock = threading.Lock()
+        self.hubExecutor = ThreadPoolExecutor(max_workers=MAX_HUB_WORKERS, thread_name_prefix='acurite-hub')
 
     def login(self):
         try:
             loginHeaders = {'Content-Type': 'application/json'}
             loginData = json.dumps(
                 {'email': self.user, 'password': self.password})
-            loginResp = requests.post('https://marapi.myacurite.com/users/login', data=loginData, headers=loginHeaders)
-            loginRespJO = loginResp.json()
+            with METRICS.timer('acurite_login_seconds'):
+                loginResp = self.transport.post(self.baseUrl + '/users/login', data=loginData, headers=loginHeaders)
+            return self.parseLogin(loginResp.status_code, loginResp.json())
+        except Exception as e:
+            LOGGER.error('Failed to Login to Acurite: {}'.format(e))
+            return None, None
 
-            statusCode = loginResp.status_code
-            if statusCode != 200:
-                return None, None
+    def parseLogin(self, statusCode, loginRespJO):
+        if statusCode != 200:
+            return None, None
 
-            LOGGER.info('Login HTTP Status Code: {}'.format(str(statusCode)))
-            LOGGER.debug(json.dumps(loginRespJO))
-            accountId = loginRespJO['user']['account_users'][0]['account_id']
-            tokenId = loginRespJO['token_id']
-        except Exception as e:
-            LOGGER.error('Failed to Login to Acurite', e)
+        LOGGER.info('Login HTTP Status Code: {}'.format(str(statusCode)))
+        LOGGER.debug('%s', LazyJson(loginRespJO, redacted=True))
+        accountId = loginRespJO['user']['account_users'][0]['account_id']
+        tokenId = loginRespJO['token_id']
+        return tokenId, accountId
+
+    def getToken(self, staleTokenId=None):
+        # Only one thread logs in at a time; a caller that was waiting on the lock picks up
+        # the token the first caller just fetched instead of logging in again.
+        with self.tokenLock:
+            if self.isTokenValid(staleTokenId):
+                return self.tokenId, self.accountId
+            return self.storeToken(*self.login())
+
+    def isTokenValid(self, staleTokenId):
+        tokenAge = time.monotonic() - self.tokenTime
+        return self.tokenId is not None and self.tokenId != staleTokenId and tokenAge < TOKEN_MAX_AGE
+
+    def storeToken(self, tokenId, accountId):
+        METRICS.increment('acurite_token_refreshes', {'result': 'failed' if tokenId is None else 'ok'})
+        if tokenId is None or accountId is None:
+            self.tokenId = None
+            self.accountId = None
             return None, None
+
+        self.tokenId = tokenId
+        self.accountId = accountId
+        self.tokenTime = time.monotonic()
         return tokenId, accountId
 
-    def getHubDevices(self):
-        tokenId, accountId = self.login()
-        if tokenId is not None and accountId is not None:
-            try:
-                hubHeaders = {'Content-Type': 'application/json', 'X-ONE-VUE-TOKEN': tokenId}
-                hubResp = requests.get('https://marapi.myacurite.com/accounts/{}/dashboard/hubs'.format(str(accountId)),
-                                       headers=hubHeaders)
-                hubsRespJO = hubResp.json()
-                hubId = hubsRespJO['account_hubs'][0]['id']
-
-                deviceHeaders = {'Content-Type': 'application/json', 'X-ONE-VUE-TOKEN': tokenId}
-                deviceResp = requests.get(
-                    'https://marapi.myacurite.com/accounts/{}/dashboard/hubs/{}'.format(str(accountId), str(hubId)),
-                    headers=deviceHeaders)
-                deviceRespJO = deviceResp.json()
-                statusCode = deviceResp.status_code
-                if statusCode != 200:
-                    return None
-                LOGGER.info('Got Acurite Devices')
-                return deviceRespJO
-            except Exception as e:
-                LOGGER.error('AcuriteManager - Error in update', e)
+    def authorizedGet(self, path, extraHeaders=None):
+        staleTokenId = None
+        for attempt in range(2):
+            tokenId, accountId = self.getToken(staleTokenId)
+            if tokenId is None or accountId is None:
                 return None
+            headers = {'Content-Type': 'application/json', 'X-ONE-VUE-TOKEN': tokenId}
+            if extraHeaders is not None:
+                headers.update(extraHeaders)
+            resp = self.transport.get('{}/accounts/{}/{}'.format(self.baseUrl, str(accountId), path), headers=headers)
+            if resp.status_code not in AUTH_FAILURE_CODES:
+                return resp
+            LOGGER.info('Acurite token rejected with HTTP Status Code: {}, logging in again'.format(resp.status_code))
+            staleTokenId = tokenId
+        return None
+
+    def getHubs(self):
+        hubResp = self.authorizedGet('dashboard/hubs')
+        if hubResp is None or hubResp.status_code != 200:
+            return None
+        return hubResp.json()['account_hubs']
+
+    def hubRequestHeaders(self, hubId):
+        cached = self.hubCache.get(hubId)
+        return {'If-None-Match': cached[0]} if cached is not None else None
+
+    def getDevicesForHub(self, hubId):
+        deviceResp = self.authorizedGet('dashboard/hubs/{}'.format(str(hubId)), self.hubRequestHeaders(hubId))
+        if deviceResp is None:
+            LOGGER.error('Failed to get devices for hub {}'.format(hubId))
+            return None
+        return self.parseHubDevices(hubId, deviceResp.status_code, deviceResp.headers, deviceResp.content)
+
+    def parseHubDevices(self, hubId, statusCode, headers, content):
+        cached = self.hubCache.get(hubId)
+        if statusCode == 304 and cached is not None:
+            debug('Hub {} not modified', hubId)
+            content = cached[1]
+        elif statusCode != 200:
+            LOGGER.error('Failed to get devices for hub {}, HTTP Status Code: {}'.format(hubId, statusCode))
+            return None
         else:
+            etag = headers.get('ETag')
+            if etag is not None:
+                self.hubCache[hubId] = (etag, content)
+
+        try:
+            devices = json.loads(content)['devices']
+        except (ValueError, KeyError, TypeError) as e:
+            METRICS.increment('acurite_parse_errors', {'stage': 'hub'})
+            LOGGER.error('Unable to parse devices for hub {}: {}'.format(hubId, e))
             return None
+        for device in devices:
+            if device is not None:
+                device['unchanged'] = self.isFingerprintMatch(device)
+                device['hub_id'] = hubId
+        return devices
+
+    def isFingerprintMatch(self, device):
+        # Hash the device block as received, before any local tags are added to it
+        fingerprint = hashlib.sha1(json.dumps(device, sort_keys=True).encode('utf-8')).digest()
+        with self.fingerprintLock:
+            unchanged = self.fingerprints.get(device.get('id')) == fingerprint
+            self.fingerprints[device.get('id')] = fingerprint
+            self.fingerprintChecks += 1
+            if unchanged:
+                self.fingerprintHits += 1
+        return unchanged
+
+    def getHubDevices(self):
+        with METRICS.timer('acurite_fetch_seconds'):
+            return self.fetchHubDevices()
+
+    def fetchHubDevices(self):
+        try:
+            hubs = self.getHubs()
+            if hubs is None or len(hubs) == 0:
+                return None
+
+            # Fetch every hub at once so a poll only takes as long as the slowest hub
+            futures = [(hub['id'], self.hubExecutor.submit(self.getDevicesForHub, hub['id'])) for hub in hubs]
+            results = []
+            for hubId, future in futures:
+                try:
+                    results.append((hubId, future.result()))
+                except Exception as e:
+                    LOGGER.error('AcuriteManager - Error getting devices for hub {}: {}'.format(hubId, e))
+                    results.append((hubId, None))
+            return self.mergeHubDevices(results)
+        except Exception as e:
+            LOGGER.error('AcuriteManager - Error in update: {}'.format(e))
+            return None
+
+    def mergeHubDevices(self, results):
+        """Merges (hub id, device list or None) results, returning None when every hub failed."""
+        devices = []
+        failedHubs = []
+        for hubId, hubDevices in results:
+            if hubDevices is None:
+                failedHubs.append(hubId)
+            else:
+                devices.extend(hubDevices)
+
+        if len(failedHubs) == len(results):
+            return None
+        LOGGER.info('Got Acurite Devices from {} of {} hubs'.format(len(results) - len(failedHubs), len(results)))
+        self.logFingerprintHits(devices)
+        return {'devices': devices, 'hubs': [hubId for hubId, hubDevices in results], 'failed_hubs': failedHubs}
+
+    def logFingerprintHits(self, devices):
+        unchanged = len([device for device in devices if device is not None and device['unchanged']])
+        with self.fingerprintLock:
+            hitRate = 100.0 * self.fingerprintHits / self.fingerprintChecks if self.fingerprintChecks > 0 else 0
+        LOGGER.info('Unchanged devices: {} of {}, overall hit rate {:.0f}%'.format(unchanged, len(devices), hitRate))
+
+    def close(self):
+        self.hubExecutor.shutdown(wait=False)
+        self.transport.close()
 
     def convert_timedelta_min(self, duration):
         days, seconds = duration.days, duration.seconds
@@ -0,0 +1,74 @@
+import random
+import time
+
+import requests
+import udi_interface
+from requests.adapters import HTTPAdapter
+
+from .Metrics import METRICS
+
+LOGGER = udi_interface.LOGGER
+
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 15.0
+DEFAULT_MAX_RETRIES = 3
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+POOL_SIZE = 8
+
+
+class AcuriteTransport():
+    """Pooled keep-alive HTTP session with timeouts and retry/backoff on 5xx and connection errors."""
+
+    def __init__(self, connectTimeout=DEFAULT_CONNECT_TIMEOUT, readTimeout=DEFAULT_READ_TIMEOUT,
+                 maxRetries=DEFAULT_MAX_RETRIES):
+        self.connectTimeout = connectTimeout
+        self.readTimeout = readTimeout
+        self.maxRetries = maxRetries
+        self.session = requests.Session()
+        # Retries are handled here so the backoff can be logged and bounded; the adapter never retries itself
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def configure(self, connectTimeout, readTimeout, maxRetries):
+        self.connectTimeout = connectTimeout
+        self.readTimeout = readTimeout
+        self.maxRetries = maxRetries
+
+    def backoffDelay(self, attempt):
+        # Full jitter: spread retries from overlapping callers over the whole window
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', (self.connectTimeout, self.readTimeout))
+        resp = None
+        for attempt in range(self.maxRetries + 1):
+            try:
+                resp = self.session.request(method, url, **kwargs)
+                METRICS.increment('acurite_http_responses', {'status': resp.status_code})
+                if resp.status_code < 500:
+                    return resp
+                LOGGER.warning('{} {} returned HTTP Status Code: {}'.format(method, url, resp.status_code))
+            except (requests.ConnectionError, requests.Timeout) as e:
+                METRICS.increment('acurite_http_responses', {'status': type(e).__name__})
+                if attempt == self.maxRetries:
+                    raise
+                LOGGER.warning('{} {} failed: {}'.format(method, url, e))
+
+            if attempt < self.maxRetries:
+                delay = self.backoffDelay(attempt)
+                METRICS.increment('acurite_http_retries')
+                LOGGER.info('Retrying {} {} in {:.1f}s (attempt {} of {})'.format(method, url, delay, attempt + 1,
+                                                                                  self.maxRetries))
+                time.sleep(delay)
+        return resp
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,147 @@
+import asyncio
+import json
+
+import udi_interface
+
+from .AcuriteManager import AcuriteManager, BASE_URL, AUTH_FAILURE_CODES
+from .AcuriteTransport import POOL_SIZE
+from .Metrics import METRICS
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+LOGGER = udi_interface.LOGGER
+
+
+class AsyncResponse():
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class AsyncAcuriteManager(AcuriteManager):
+    """AcuriteManager on aiohttp, pipelining login, hub listing and hub fetches on the engine's event loop."""
+
+    def __init__(self, user, password, transport=None, baseUrl=BASE_URL):
+        super(AsyncAcuriteManager, self).__init__(user, password, transport, baseUrl)
+        self.session = None
+        self.loop = None
+        self.asyncTokenLock = None
+
+    @staticmethod
+    def isAvailable():
+        return aiohttp is not None
+
+    async def getSession(self):
+        # The session and lock must be created on the loop that will use them
+        if self.session is None:
+            self.loop = asyncio.get_running_loop()
+            self.asyncTokenLock = asyncio.Lock()
+            self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=POOL_SIZE))
+        return self.session
+
+    async def requestAsync(self, method, url, **kwargs):
+        session = await self.getSession()
+        transport = self.transport
+        timeout = aiohttp.ClientTimeout(connect=transport.connectTimeout, sock_read=transport.readTimeout)
+        resp = None
+        for attempt in range(transport.maxRetries + 1):
+            try:
+                async with session.request(method, url, timeout=timeout, **kwargs) as httpResp:
+                    resp = AsyncResponse(httpResp.status, httpResp.headers, await httpResp.read())
+                METRICS.increment('acurite_http_responses', {'status': resp.status_code})
+                if resp.status_code < 500:
+                    return resp
+                LOGGER.warning('{} {} returned HTTP Status Code: {}'.format(method, url, resp.status_code))
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                METRICS.increment('acurite_http_responses', {'status': type(e).__name__})
+                if attempt == transport.maxRetries:
+                    raise
+                LOGGER.warning('{} {} failed: {}'.format(method, url, e))
+
+            if attempt < transport.maxRetries:
+                METRICS.increment('acurite_http_retries')
+                await asyncio.sleep(transport.backoffDelay(attempt))
+        return resp
+
+    async def loginAsync(self):
+        try:
+            loginHeaders = {'Content-Type': 'application/json'}
+            loginData = json.dumps({'email': self.user, 'password': self.password})
+            with METRICS.timer('acurite_login_seconds'):
+                loginResp = await self.requestAsync('POST', self.baseUrl + '/users/login', data=loginData,
+                                                    headers=loginHeaders)
+            return self.parseLogin(loginResp.status_code, loginResp.json())
+        except Exception as e:
+            LOGGER.error('Failed to Login to Acurite: {}'.format(e))
+            return None, None
+
+    async def getTokenAsync(self, staleTokenId=None):
+        await self.getSession()
+        async with self.asyncTokenLock:
+            if self.isTokenValid(staleTokenId):
+                return self.tokenId, self.accountId
+            return self.storeToken(*(await self.loginAsync()))
+
+    async def authorizedGetAsync(self, path, extraHeaders=None):
+        staleTokenId = None
+        for attempt in range(2):
+            tokenId, accountId = await self.getTokenAsync(staleTokenId)
+            if tokenId is None or accountId is None:
+                return None
+            headers = {'Content-Type': 'application/json', 'X-ONE-VUE-TOKEN': tokenId}
+            if extraHeaders is not None:
+                headers.update(extraHeaders)
+            resp = await self.requestAsync('GET', '{}/accounts/{}/{}'.format(self.baseUrl, str(accountId), path),
+                                           headers=headers)
+            if resp.status_code not in AUTH_FAILURE_CODES:
+                return resp
+            LOGGER.info('Acurite token rejected with HTTP Status Code: {}, logging in again'.format(resp.status_code))
+            staleTokenId = tokenId
+        return None
+
+    async def getDevicesForHubAsync(self, hubId):
+        deviceResp = await self.authorizedGetAsync('dashboard/hubs/{}'.format(str(hubId)),
+                                                   self.hubRequestHeaders(hubId))
+        if deviceResp is None:
+            LOGGER.error('Failed to get devices for hub {}'.format(hubId))
+            return None
+        return self.parseHubDevices(hubId, deviceResp.status_code, deviceResp.headers, deviceResp.content)
+
+    async def getHubDevicesAsync(self):
+        with METRICS.timer('acurite_fetch_seconds'):
+            return await self.fetchHubDevicesAsync()
+
+    async def fetchHubDevicesAsync(self):
+        try:
+            hubResp = await self.authorizedGetAsync('dashboard/hubs')
+            if hubResp is None or hubResp.status_code != 200:
+                return None
+            hubIds = [hub['id'] for hub in hubResp.json()['account_hubs']]
+            if len(hubIds) == 0:
+                return None
+
+            hubResults = await asyncio.gather(*[self.getDevicesForHubAsync(hubId) for hubId in hubIds],
+                                              return_exceptions=True)
+            results = []
+            for hubId, hubDevices in zip(hubIds, hubResults):
+                if isinstance(hubDevices, Exception):
+                    LOGGER.error('AsyncAcuriteManager - Error getting devices for hub {}: {}'.format(hubId, hubDevices))
+                    hubDevices = None
+                results.append((hubId, hubDevices))
+            return self.mergeHubDevices(results)
+        except Exception as e:
+            LOGGER.error('AsyncAcuriteManager - Error in update: {}'.format(e))
+            return None
+
+    def close(self):
+        if self.session is not None and self.loop is not None and self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self.session.close(), self.loop)
+        self.session = None
+        super(AsyncAcuriteManager, self).close()
@@ -0,0 +1,39 @@
+import asyncio
+import threading
+
+import udi_interface
+
+LOGGER = udi_interface.LOGGER
+
+
+class AsyncPollEngine():
+    """Runs fetch coroutines on a dedicated event loop thread and posts each result onto a thread-safe queue."""
+
+    def __init__(self, resultQueue):
+        self.resultQueue = resultQueue
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.run, name='acurite-async', daemon=True)
+        self.thread.start()
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, fetch):
+        """Schedules the coroutine function fetch without waiting for it; its result arrives on resultQueue."""
+        return asyncio.run_coroutine_threadsafe(self.deliver(fetch), self.loop)
+
+    def call(self, fetch, timeout=None):
+        """Runs the coroutine function fetch on the loop and blocks the calling thread until it returns."""
+        return asyncio.run_coroutine_threadsafe(fetch(), self.loop).result(timeout)
+
+    async def deliver(self, fetch):
+        try:
+            result = await fetch()
+        except Exception as e:
+            LOGGER.error('AsyncPollEngine - Fetch failed: {}'.format(e))
+            result = None
+        self.resultQueue.put(result)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
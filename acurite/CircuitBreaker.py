@@ -0,0 +1,69 @@
+import threading
+import time
+
+import udi_interface
+
+from .Metrics import METRICS
+
+LOGGER = udi_interface.LOGGER
+
+FAILURE_THRESHOLD = 3
+PROBE_INTERVAL = 60
+PROBE_INTERVAL_MAX = 30 * 60
+
+# Values double as the controller's GV0 driver value
+CLOSED = 0
+OPEN = 1
+HALF_OPEN = 2
+STATE_NAMES = {CLOSED: 'closed', OPEN: 'open', HALF_OPEN: 'half_open'}
+
+
+class CircuitBreaker():
+    """Stops fetching after repeated failures and lets a single probe through on a doubling interval."""
+
+    def __init__(self, failureThreshold=FAILURE_THRESHOLD, probeInterval=PROBE_INTERVAL,
+                 probeIntervalMax=PROBE_INTERVAL_MAX):
+        self.failureThreshold = failureThreshold
+        self.probeInterval = probeInterval
+        self.probeIntervalMax = probeIntervalMax
+        self.state = CLOSED
+        self.failures = 0
+        self.opens = 0
+        self.nextProbe = 0
+        self.lock = threading.Lock()
+
+    def allow(self, now=None):
+        """True when a fetch may be made; an open circuit allows one probe once its interval has passed."""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and now >= self.nextProbe:
+                self.transition(HALF_OPEN)
+                return True
+            # Open and still waiting, or a probe is already in flight
+            return False
+
+    def recordSuccess(self):
+        with self.lock:
+            self.failures = 0
+            self.opens = 0
+            if self.state != CLOSED:
+                LOGGER.info('Acurite API is responding again')
+                self.transition(CLOSED)
+
+    def recordFailure(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failureThreshold:
+                self.opens += 1
+                delay = min(self.probeIntervalMax, self.probeInterval * (2 ** (self.opens - 1)))
+                self.nextProbe = now + delay
+                if self.state != OPEN:
+                    self.transition(OPEN)
+                LOGGER.error('Acurite API failed {} times, next attempt in {:.0f}s'.format(self.failures, delay))
+
+    def transition(self, state):
+        self.state = state
+        METRICS.increment('acurite_circuit_transitions', {'state': STATE_NAMES[state]})
@@ -0,0 +1,109 @@
+from collections import deque
+
+HOUR = 60 * 60
+GUST_WINDOW = 10 * 60
+
+
+class RollingSum():
+    """Sum of the values added within the last window seconds."""
+
+    def __init__(self, window):
+        self.window = window
+        self.samples = deque()
+        self.total = 0.0
+
+    def add(self, timestamp, value):
+        self.samples.append((timestamp, value))
+        self.total += value
+        self.expire(timestamp)
+
+    def expire(self, now):
+        while len(self.samples) > 0 and self.samples[0][0] <= now - self.window:
+            self.total -= self.samples.popleft()[1]
+
+    def value(self):
+        return self.total
+
+
+class RollingDelta():
+    """Change between the oldest and newest values within the last window seconds."""
+
+    def __init__(self, window):
+        self.window = window
+        self.samples = deque()
+
+    def add(self, timestamp, value):
+        self.samples.append((timestamp, value))
+        while self.samples[0][0] < timestamp - self.window:
+            self.samples.popleft()
+
+    def value(self):
+        if len(self.samples) < 2:
+            return 0.0
+        return self.samples[-1][1] - self.samples[0][1]
+
+
+class RollingMax():
+    """Maximum of the values added within the last window seconds, kept in a monotonic deque."""
+
+    def __init__(self, window):
+        self.window = window
+        self.samples = deque()
+
+    def add(self, timestamp, value):
+        while len(self.samples) > 0 and self.samples[-1][1] <= value:
+            self.samples.pop()
+        self.samples.append((timestamp, value))
+        while self.samples[0][0] <= timestamp - self.window:
+            self.samples.popleft()
+
+    def value(self):
+        return self.samples[0][1] if len(self.samples) > 0 else 0.0
+
+
+class DerivedMetrics():
+    """Rolling rain totals, pressure tendency and max gust for one device, updated once per check-in."""
+
+    def __init__(self):
+        self.lastTimestamp = None
+        self.lastRainfall = None
+        self.rain1h = RollingSum(HOUR)
+        self.rain24h = RollingSum(24 * HOUR)
+        self.pressure3h = RollingDelta(3 * HOUR)
+        self.maxGust = RollingMax(GUST_WINDOW)
+
+    def rainIncrement(self, rainfall):
+        # Rainfall accumulates through the day and resets to zero at midnight
+        if self.lastRainfall is None:
+            increment = 0.0
+        elif rainfall >= self.lastRainfall:
+            increment = rainfall - self.lastRainfall
+        else:
+            increment = rainfall
+        self.lastRainfall = rainfall
+        return increment
+
+    def update(self, timestamp, sensorIndex):
+        """Adds the readings for a check-in, ignoring check-ins that were already counted."""
+        if self.lastTimestamp is not None and timestamp <= self.lastTimestamp:
+            return False
+        self.lastTimestamp = timestamp
+
+        rainfall = sensorIndex.value('Rainfall')
+        if rainfall is not None:
+            increment = self.rainIncrement(float(rainfall))
+            self.rain1h.add(timestamp, increment)
+            self.rain24h.add(timestamp, increment)
+        pressure = sensorIndex.value('Barometric Pressure')
+        if pressure is not None:
+            self.pressure3h.add(timestamp, float(pressure))
+        windSpeed = sensorIndex.value('Wind Speed')
+        if windSpeed is not None:
+            self.maxGust.add(timestamp, float(windSpeed))
+        return True
+
+    def drivers(self):
+        return [('GV9', round(self.rain1h.value(), 2)),
+                ('GV10', round(self.rain24h.value(), 2)),
+                ('GV11', round(self.pressure3h.value(), 2)),
+                ('GV12', round(self.maxGust.value(), 1))]
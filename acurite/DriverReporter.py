@@ -0,0 +1,135 @@
+import threading
+from contextlib import contextmanager
+
+import udi_interface
+
+from .Metrics import METRICS
+
+LOGGER = udi_interface.LOGGER
+
+
+class DriverReporter():
+    """Remembers the last value reported per node/driver and only reports values that moved past their deadband."""
+
+    def __init__(self, deadbands=None):
+        self.deadbands = deadbands if deadbands is not None else {}
+        self.lastValues = {}
+        self.sentCount = 0
+        self.suppressedCount = 0
+        self.lock = threading.Lock()
+        self.batchState = threading.local()
+        self.flushCount = 0
+
+    @staticmethod
+    def parseDeadbands(value):
+        # Format: DRIVER=deadband[,DRIVER=deadband...], e.g. CLITEMP=0.1,CLIHUM=1
+        deadbands = {}
+        if value is None:
+            return deadbands
+        for entry in str(value).split(','):
+            if len(entry.strip()) == 0:
+                continue
+            try:
+                driver, deadband = entry.split('=')
+                deadbands[driver.strip().upper()] = abs(float(deadband))
+            except ValueError:
+                LOGGER.error('Invalid deadband entry: {}'.format(entry))
+        return deadbands
+
+    def isWithinDeadband(self, driver, lastValue, value):
+        try:
+            return abs(float(value) - float(lastValue)) < self.deadbands.get(driver, 0) or \
+                float(value) == float(lastValue)
+        except (TypeError, ValueError):
+            return value == lastValue
+
+    def report(self, node, driver, value):
+        key = (node.address, driver)
+        with self.lock:
+            firstReport = key not in self.lastValues
+            if not firstReport and self.isWithinDeadband(driver, self.lastValues[key], value):
+                self.suppressedCount += 1
+                METRICS.increment('acurite_driver_reports', {'result': 'suppressed'})
+                return False
+            self.lastValues[key] = value
+            self.sentCount += 1
+        METRICS.increment('acurite_driver_reports', {'result': 'sent'})
+        pending = getattr(self.batchState, 'pending', None)
+        if pending is not None:
+            # Inside a batch the value is only stored locally until the batch flushes
+            node.setDriver(driver, value, False)
+            pending[key] = node
+            return True
+        # The first report after start or a refresh is forced so the ISY is guaranteed to be in sync
+        node.setDriver(driver, value, True, firstReport)
+        return True
+
+    def reportAll(self, node):
+        """Reports every driver of node whatever its deadband, the way a QUERY has to be answered."""
+        with self.lock:
+            for driver in node.drivers:
+                self.lastValues[(node.address, driver['driver'])] = driver['value']
+        pending = getattr(self.batchState, 'pending', None)
+        if pending is None:
+            node.reportDrivers()
+            return
+        # Drivers already pending in this batch are keyed the same, so each one still goes out once
+        for driver in node.drivers:
+            pending[(node.address, driver['driver'])] = node
+
+    @contextmanager
+    def batch(self):
+        """Collects every report made on this thread and sends them as one status message on exit.
+
+        Batches nest; only the outermost one flushes, so a controller-wide batch around several node
+        updates sends a single message for all of them.
+        """
+        depth = getattr(self.batchState, 'depth', 0)
+        if depth == 0:
+            self.batchState.pending = {}
+        self.batchState.depth = depth + 1
+        try:
+            yield
+        finally:
+            self.batchState.depth = depth
+            if depth == 0:
+                pending = self.batchState.pending
+                self.batchState.pending = None
+                self.flush(pending)
+
+    def flush(self, pending):
+        if len(pending) == 0:
+            return
+        message = {'set': []}
+        poly = None
+        for (address, driverName), node in pending.items():
+            for driver in node.drivers:
+                if driver['driver'] == driverName:
+                    message['set'].append({'address': node.address, 'driver': driverName,
+                                           'value': str(driver['value']), 'uom': driver['uom']})
+                    break
+            poly = node.poly
+        self.flushCount += 1
+        METRICS.increment('acurite_driver_flushes')
+        try:
+            poly.send(message, 'status')
+        except Exception as e:
+            LOGGER.error('Batched driver update failed, reporting per node: {}'.format(e))
+            for node in set(pending.values()):
+                node.reportDrivers()
+
+    def refresh(self):
+        with self.lock:
+            self.lastValues.clear()
+
+    def forgetNode(self, address):
+        with self.lock:
+            for key in [key for key in self.lastValues if key[0] == address]:
+                del self.lastValues[key]
+
+    def logSummary(self):
+        with self.lock:
+            total = self.sentCount + self.suppressedCount
+            LOGGER.info('Driver reports sent: {}, suppressed: {} ({:.0f}%), batched into {} messages'.format(
+                self.sentCount, self.suppressedCount, 100.0 * self.suppressedCount / total if total > 0 else 0,
+                self.flushCount))
@@ -0,0 +1,161 @@
+import mmap
+import os
+import re
+import shutil
+import struct
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import udi_interface
+
+LOGGER = udi_interface.LOGGER
+
+# One fixed-width record per reading: uint32 epoch seconds, float32 value
+RECORD = struct.Struct('<If')
+PARTITION_FORMAT = '%Y%m%d'
+# Written into a closed partition once it has been sorted and deduped, so it is not rewritten on every pass
+COMPACTED_MARKER = '.compacted'
+UNSAFE_NAME_CHARS = re.compile(r'[^A-Za-z0-9_.-]')
+
+
+class HistoryStore():
+    """Append-only sensor history in day-partitioned, fixed-width binary files, one file per device/sensor."""
+
+    def __init__(self, rootDir, retentionDays):
+        self.rootDir = rootDir
+        self.retentionDays = retentionDays
+        self.lastCheckIns = {}
+        self.lock = threading.Lock()
+        self.compactedDay = None
+        os.makedirs(rootDir, exist_ok=True)
+        self.compacted = {partition for partition in os.listdir(rootDir)
+                          if os.path.exists(os.path.join(rootDir, partition, COMPACTED_MARKER))}
+
+    @staticmethod
+    def partitionName(timestamp):
+        return datetime.fromtimestamp(timestamp, timezone.utc).strftime(PARTITION_FORMAT)
+
+    def seriesPath(self, partition, deviceId, sensorCode):
+        return os.path.join(self.rootDir, partition, UNSAFE_NAME_CHARS.sub('_', str(deviceId)),
+                            UNSAFE_NAME_CHARS.sub('_', sensorCode) + '.bin')
+
+    def append(self, deviceId, timestamp, readings):
+        """Appends one record per numeric reading in readings, a dict of sensor code to value."""
+        partition = self.partitionName(timestamp)
+        if partition in self.compacted:
+            # A late check-in landed in a closed partition, so it has to be compacted again
+            self.compacted.discard(partition)
+            self.compactedDay = None
+            try:
+                os.remove(os.path.join(self.rootDir, partition, COMPACTED_MARKER))
+            except FileNotFoundError:
+                pass
+        for sensorCode, value in readings.items():
+            try:
+                record = RECORD.pack(int(timestamp), float(value))
+            except (TypeError, ValueError, struct.error):
+                continue
+            path = self.seriesPath(partition, deviceId, sensorCode)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'ab') as seriesFile:
+                seriesFile.write(record)
+
+    def record(self, devices):
+        """Stores the readings of every device that has checked in since it was last recorded."""
+        with self.lock:
+            for device in devices:
+                if device is None:
+                    continue
+                checkIn = device.get('last_check_in_at')
+                deviceId = device.get('address', device.get('id'))
+                if checkIn is None or checkIn == '' or self.lastCheckIns.get(deviceId) == checkIn:
+                    continue
+                try:
+                    timestamp = datetime.fromisoformat(checkIn).timestamp()
+                except ValueError:
+                    continue
+                readings = {}
+                for group in ('sensors', 'wired_sensors'):
+                    for sensor in device.get(group) or []:
+                        readings[sensor.get('sensor_code')] = sensor.get('last_reading_value')
+                try:
+                    self.append(deviceId, timestamp, readings)
+                    self.lastCheckIns[deviceId] = checkIn
+                except OSError as e:
+                    LOGGER.error('HistoryStore - Failed to record {}: {}'.format(deviceId, e))
+
+    def lowerBound(self, data, count, timestamp):
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if RECORD.unpack_from(data, middle * RECORD.size)[0] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def query(self, deviceId, sensorCode, start, end):
+        """Returns the (timestamp, value) readings with start <= timestamp < end, oldest first."""
+        readings = []
+        day = datetime.fromtimestamp(start, timezone.utc).date()
+        lastDay = datetime.fromtimestamp(end, timezone.utc).date()
+        while day <= lastDay:
+            path = self.seriesPath(day.strftime(PARTITION_FORMAT), deviceId, sensorCode)
+            day += timedelta(days=1)
+            if not os.path.exists(path) or os.path.getsize(path) < RECORD.size:
+                continue
+            with open(path, 'rb') as seriesFile, \
+                    mmap.mmap(seriesFile.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                count = len(data) // RECORD.size
+                index = self.lowerBound(data, count, start)
+                while index < count:
+                    timestamp, value = RECORD.unpack_from(data, index * RECORD.size)
+                    if timestamp >= end:
+                        break
+                    readings.append((timestamp, value))
+                    index += 1
+        return readings
+
+    def compactSeries(self, path):
+        with open(path, 'rb') as seriesFile:
+            data = seriesFile.read()
+        data = data[:len(data) - len(data) % RECORD.size]
+        records = list(RECORD.iter_unpack(data))
+        compacted = sorted(dict(records).items())
+        if compacted == records:
+            return
+        tmpPath = path + '.tmp'
+        with open(tmpPath, 'wb') as seriesFile:
+            for timestamp, value in compacted:
+                seriesFile.write(RECORD.pack(timestamp, value))
+        os.replace(tmpPath, path)
+
+    def compact(self, now=None):
+        """Drops partitions past the retention window and sorts/dedupes the closed ones so range scans stay valid.
+
+        Runs once per day; each closed partition is compacted once, unless a late check-in is appended to it.
+        """
+        now = time.time() if now is None else now
+        today = self.partitionName(now)
+        oldest = self.partitionName(now - self.retentionDays * 24 * 60 * 60)
+        with self.lock:
+            if self.compactedDay == today:
+                return
+            self.compactedDay = today
+            for partition in sorted(os.listdir(self.rootDir)):
+                partitionDir = os.path.join(self.rootDir, partition)
+                if not os.path.isdir(partitionDir):
+                    continue
+                if partition < oldest:
+                    LOGGER.info('HistoryStore - Removing expired partition {}'.format(partition))
+                    shutil.rmtree(partitionDir, ignore_errors=True)
+                    self.compacted.discard(partition)
+                elif partition < today and partition not in self.compacted:
+                    for dirPath, dirNames, fileNames in os.walk(partitionDir):
+                        for fileName in fileNames:
+                            if fileName.endswith('.bin'):
+                                self.compactSeries(os.path.join(dirPath, fileName))
+                    with open(os.path.join(partitionDir, COMPACTED_MARKER), 'w'):
+                        pass
+                    self.compacted.add(partition)
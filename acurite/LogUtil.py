@@ -0,0 +1,74 @@
+import json
+import logging
+import threading
+
+import udi_interface
+
+LOGGER = udi_interface.LOGGER
+
+REDACTED_KEYS = {'token_id', 'password', 'email', 'access_token', 'refresh_token', 'x-one-vue-token'}
+REDACTED = '***'
+
+
+def isDebug():
+    return LOGGER.isEnabledFor(logging.DEBUG)
+
+
+def debug(message, *args):
+    """LOGGER.debug with str.format arguments, only formatted when DEBUG is enabled."""
+    if LOGGER.isEnabledFor(logging.DEBUG):
+        LOGGER.debug(message.format(*args))
+
+
+def redact(payload):
+    """Copy of payload with credentials and tokens masked, at any depth."""
+    if isinstance(payload, dict):
+        return {key: REDACTED if str(key).lower() in REDACTED_KEYS else redact(value)
+                for key, value in payload.items()}
+    if isinstance(payload, list):
+        return [redact(value) for value in payload]
+    return payload
+
+
+class LazyJson():
+    """Defers json.dumps of a payload until the log record is actually emitted."""
+
+    def __init__(self, payload, redacted=False):
+        self.payload = payload
+        self.redacted = redacted
+
+    def __str__(self):
+        return json.dumps(redact(self.payload) if self.redacted else self.payload)
+
+
+class PayloadSampler():
+    """Decides which polls dump device payloads: never, every Nth poll, or only devices that changed."""
+
+    OFF = 'off'
+    CHANGE = 'change'
+
+    def __init__(self):
+        self.mode = self.OFF
+        self.every = 0
+        self.pollCount = 0
+        self.lock = threading.Lock()
+
+    def configure(self, value):
+        value = str(value).strip().lower() if value is not None else ''
+        if value == self.CHANGE:
+            self.mode, self.every = self.CHANGE, 0
+        elif value.isdigit() and int(value) > 0:
+            self.mode, self.every = 'every', int(value)
+        else:
+            self.mode, self.every = self.OFF, 0
+
+    def nextPoll(self):
+        """Returns whether this poll should dump anything at all."""
+        if self.mode == self.OFF or not isDebug():
+            return False
+        with self.lock:
+            self.pollCount += 1
+            return self.mode == self.CHANGE or self.pollCount % self.every == 0
+
+    def shouldDump(self, device):
+        return self.mode != self.CHANGE or not device.get('unchanged', False)
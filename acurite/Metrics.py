@@ -0,0 +1,146 @@
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import udi_interface
+
+LOGGER = udi_interface.LOGGER
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+
+class Histogram():
+    def __init__(self):
+        self.bucketCounts = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.bucketCounts[index] += 1
+                break
+
+
+class Metrics():
+    """Thread-safe counters and latency histograms rendered in the OpenMetrics text format."""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+        self.server = None
+
+    @staticmethod
+    def key(name, labels):
+        return name, tuple(sorted(labels.items())) if labels else ()
+
+    def increment(self, name, labels=None, amount=1):
+        key = self.key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, value, labels=None):
+        key = self.key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = Histogram()
+                self.histograms[key] = histogram
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, labels=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, labels)
+
+    @staticmethod
+    def formatLabels(labels, extra=None):
+        pairs = list(labels) + ([extra] if extra is not None else [])
+        if len(pairs) == 0:
+            return ''
+        return '{' + ','.join('{}="{}"'.format(label, str(value).replace('"', '\\"')) for label, value in pairs) + '}'
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for name in sorted(set(name for name, labels in self.counters)):
+                lines.append('# TYPE {} counter'.format(name))
+                for (counterName, labels), value in sorted(self.counters.items()):
+                    if counterName == name:
+                        lines.append('{}_total{} {}'.format(name, self.formatLabels(labels), value))
+            for name in sorted(set(name for name, labels in self.histograms)):
+                lines.append('# TYPE {} histogram'.format(name))
+                lines.append('# UNIT {} seconds'.format(name))
+                for (histogramName, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                    if histogramName != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(LATENCY_BUCKETS, histogram.bucketCounts):
+                        cumulative += count
+                        lines.append('{}_bucket{} {}'.format(name, self.formatLabels(labels, ('le', bound)),
+                                                             cumulative))
+                    lines.append('{}_bucket{} {}'.format(name, self.formatLabels(labels, ('le', '+Inf')),
+                                                         histogram.count))
+                    lines.append('{}_count{} {}'.format(name, self.formatLabels(labels), histogram.count))
+                    lines.append('{}_sum{} {}'.format(name, self.formatLabels(labels), histogram.sum))
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """One line with the mean latency of every stage and every counter, for the periodic log."""
+        parts = []
+        with self.lock:
+            for (name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                if histogram.count > 0:
+                    parts.append('{}{} avg {:.3f}s n={}'.format(name, self.formatLabels(labels),
+                                                                histogram.sum / histogram.count, histogram.count))
+            for (name, labels), value in sorted(self.counters.items()):
+                parts.append('{}{}={}'.format(name, self.formatLabels(labels), value))
+        return ', '.join(parts)
+
+    def logSummary(self):
+        LOGGER.info('Metrics: {}'.format(self.summary()))
+
+    def startServer(self, port):
+        if self.server is not None:
+            if self.server.server_port == port:
+                return
+            self.stopServer()
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self.server = ThreadingHTTPServer(('127.0.0.1', port), MetricsHandler)
+        except OSError as e:
+            LOGGER.error('Unable to start metrics endpoint on port {}: {}'.format(port, e))
+            return
+        threading.Thread(target=self.server.serve_forever, name='acurite-metrics', daemon=True).start()
+        LOGGER.info('Metrics endpoint listening on http://127.0.0.1:{}/metrics'.format(port))
+
+    def stopServer(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+METRICS = Metrics()
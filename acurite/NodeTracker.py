@@ -0,0 +1,34 @@
+import threading
+from concurrent.futures import Future, wait
+
+import udi_interface
+
+LOGGER = udi_interface.LOGGER
+
+
+class NodeTracker():
+    """Tracks pending node registrations with a future per address, resolved by the ADDNODEDONE callback."""
+
+    def __init__(self):
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def expect(self, address):
+        with self.lock:
+            future = self.pending.get(str(address))
+            if future is None:
+                future = Future()
+                self.pending[str(address)] = future
+            return future
+
+    def nodeAdded(self, data):
+        address = data.get('address') if isinstance(data, dict) else data
+        with self.lock:
+            future = self.pending.pop(str(address), None)
+        if future is not None and not future.done():
+            future.set_result(address)
+
+    def waitFor(self, futures, timeout):
+        """Blocks until every future from expect() resolves or the timeout passes, returning the addresses still pending."""
+        done, notDone = wait(futures.keys(), timeout=timeout)
+        return [futures[future] for future in notDone]
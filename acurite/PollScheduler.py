@@ -0,0 +1,95 @@
+import threading
+import time
+from datetime import datetime
+
+import udi_interface
+
+from .LogUtil import debug
+
+LOGGER = udi_interface.LOGGER
+
+MIN_INTERVAL = 30
+MAX_INTERVAL = 15 * 60
+# Hubs upload a little after the device checks in, so give the cloud a moment before fetching
+CHECK_IN_GRACE = 15
+CADENCE_SMOOTHING = 0.3
+OFFLINE_STATUS = 'red'
+
+
+class PollScheduler():
+    """Learns each hub's check-in cadence from last_check_in_at and decides when the next fetch is worth making."""
+
+    def __init__(self, minInterval=MIN_INTERVAL, maxInterval=MAX_INTERVAL):
+        self.minInterval = minInterval
+        self.maxInterval = maxInterval
+        self.hubs = {}
+        self.idleCount = 0
+        self.nextFetch = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def parseCheckIn(lastCheckIn):
+        if lastCheckIn is None or lastCheckIn == '':
+            return None
+        try:
+            return datetime.fromisoformat(lastCheckIn).timestamp()
+        except ValueError:
+            return None
+
+    def isDue(self, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            return now >= self.nextFetch
+
+    def latestCheckIns(self, devices):
+        latest = {}
+        for device in devices:
+            if device is None or device.get('status_code') == OFFLINE_STATUS:
+                continue
+            checkIn = self.parseCheckIn(device.get('last_check_in_at'))
+            if checkIn is None:
+                continue
+            hubKey = (device.get('account'), device.get('hub_id'))
+            latest[hubKey] = max(checkIn, latest.get(hubKey, checkIn))
+        return latest
+
+    def record(self, devices, now=None):
+        now = time.time() if now is None else now
+        latest = self.latestCheckIns(devices)
+        with self.lock:
+            advanced = False
+            expected = []
+            for hubKey, checkIn in latest.items():
+                hub = self.hubs.get(hubKey)
+                if hub is None:
+                    hub = {'lastCheckIn': checkIn, 'cadence': None}
+                    self.hubs[hubKey] = hub
+                    advanced = True
+                elif checkIn > hub['lastCheckIn']:
+                    interval = checkIn - hub['lastCheckIn']
+                    if hub['cadence'] is None:
+                        hub['cadence'] = interval
+                    else:
+                        hub['cadence'] += CADENCE_SMOOTHING * (interval - hub['cadence'])
+                    hub['lastCheckIn'] = checkIn
+                    advanced = True
+                if hub['cadence'] is not None:
+                    expected.append(hub['lastCheckIn'] + hub['cadence'] + CHECK_IN_GRACE)
+
+            self.idleCount = 0 if advanced else self.idleCount + 1
+            if len(latest) == 0:
+                # Every device is offline, nothing new will show up until one comes back
+                delay = self.maxInterval
+            elif self.idleCount > 0:
+                delay = self.minInterval * (2 ** self.idleCount)
+            else:
+                upcoming = [expectedAt - now for expectedAt in expected if expectedAt > now]
+                delay = min(upcoming) if len(upcoming) > 0 else self.minInterval
+            delay = max(self.minInterval, min(self.maxInterval, delay))
+            self.nextFetch = now + delay
+        debug('Next Acurite fetch in {:.0f}s', delay)
+
+    def fetchFailed(self, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            self.nextFetch = now + self.minInterval
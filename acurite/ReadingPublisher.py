@@ -0,0 +1,192 @@
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from urllib.parse import urlparse
+
+import requests
+import udi_interface
+
+from .Metrics import METRICS
+from .SensorIndex import SENSOR_GROUPS
+
+try:
+    import paho.mqtt.client as mqtt
+except ImportError:
+    mqtt = None
+
+LOGGER = udi_interface.LOGGER
+
+QUEUE_SIZE = 1000
+BATCH_SIZE = 100
+# Wait this long for more readings once the first arrives, so a whole poll goes out as one batch
+BATCH_WINDOW = 0.2
+MQTT_DEFAULT_PORT = 1883
+MQTT_KEEPALIVE = 60
+MQTT_QOS = 0
+WEBHOOK_TIMEOUT = 10
+FORMATS = ('json', 'line')
+
+
+def escapeLineProtocol(value, special):
+    text = str(value)
+    for character in '\\' + special:
+        text = text.replace(character, '\\' + character)
+    return text
+
+
+def formatLine(record):
+    # Influx line protocol, one line per device: acurite,device=...,model=... <sensor>=<value>,... <ns>
+    tags = ','.join('{}={}'.format(key, escapeLineProtocol(record[key], ', =')) for key in ('device', 'model', 'name'))
+    fields = ','.join('{}={}'.format(escapeLineProtocol(sensorCode, ', ='), value)
+                      for sensorCode, value in record['readings'].items())
+    return 'acurite,{} {} {}'.format(tags, fields, int(record['time'] * 1e9))
+
+
+class MqttSink():
+    """Publishes over one persistent MQTT connection that paho reconnects on its own."""
+
+    def __init__(self, target):
+        self.topic = target.path.strip('/') or 'acurite'
+        self.client = mqtt.Client()
+        if target.username is not None:
+            self.client.username_pw_set(target.username, target.password)
+        self.client.reconnect_delay_set(1, 60)
+        self.client.connect_async(target.hostname, target.port or MQTT_DEFAULT_PORT, MQTT_KEEPALIVE)
+        self.client.loop_start()
+
+    def send(self, records, messageFormat):
+        if messageFormat == 'line':
+            self.client.publish(self.topic, '\n'.join(formatLine(record) for record in records), MQTT_QOS)
+            return
+        for record in records:
+            self.client.publish('{}/{}'.format(self.topic, record['device']),
+                                json.dumps(record, separators=(',', ':')), MQTT_QOS)
+
+    def close(self):
+        self.client.loop_stop()
+        self.client.disconnect()
+
+
+class WebhookSink():
+    """POSTs each batch to a URL over a keep-alive session."""
+
+    def __init__(self, target):
+        self.url = target.geturl()
+        self.session = requests.Session()
+
+    def send(self, records, messageFormat):
+        if messageFormat == 'line':
+            body = '\n'.join(formatLine(record) for record in records)
+            headers = {'Content-Type': 'text/plain; charset=utf-8'}
+        else:
+            body = json.dumps(records, separators=(',', ':'))
+            headers = {'Content-Type': 'application/json'}
+        response = self.session.post(self.url, data=body.encode('utf-8'), headers=headers, timeout=WEBHOOK_TIMEOUT)
+        if response.status_code >= 300:
+            raise IOError('HTTP Status Code: {}'.format(response.status_code))
+
+    def close(self):
+        self.session.close()
+
+
+class ReadingPublisher():
+    """Fans every changed device reading out to MQTT or a webhook.
+
+    offer() only diffs and enqueues; formatting and network I/O happen on a background thread. The queue is
+    bounded and drops the oldest record when full, so a slow or unreachable sink never stalls polling.
+    """
+
+    def __init__(self, target, messageFormat='json', queueSize=QUEUE_SIZE, batchSize=BATCH_SIZE):
+        self.target = target
+        self.messageFormat = messageFormat
+        self.batchSize = batchSize
+        self.queue = deque(maxlen=queueSize)
+        self.condition = threading.Condition()
+        self.lastPublished = {}
+        self.droppedCount = 0
+        self.running = True
+        self.sink = self.createSink(target)
+        self.thread = threading.Thread(target=self.run, name='acurite-publisher', daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def isAvailable(target):
+        return urlparse(target).scheme != 'mqtt' or mqtt is not None
+
+    @staticmethod
+    def createSink(target):
+        parsedTarget = urlparse(target)
+        if parsedTarget.scheme == 'mqtt':
+            return MqttSink(parsedTarget)
+        if parsedTarget.scheme in ('http', 'https'):
+            return WebhookSink(parsedTarget)
+        raise ValueError('Unsupported publish target: {}'.format(target))
+
+    @staticmethod
+    def checkInTime(device):
+        try:
+            return datetime.fromisoformat(device.get('last_check_in_at')).timestamp()
+        except (TypeError, ValueError):
+            return time.time()
+
+    def offer(self, device):
+        """Queues the readings of device that changed since they were last published."""
+        address = device['address']
+        readings = {}
+        for group in SENSOR_GROUPS:
+            for sensor in device.get(group) or []:
+                sensorCode = sensor.get('sensor_code')
+                value = sensor.get('last_reading_value')
+                if not isinstance(value, (int, float)) or isinstance(value, bool):
+                    continue
+                if self.lastPublished.get((address, sensorCode)) != value:
+                    self.lastPublished[(address, sensorCode)] = value
+                    readings[sensorCode] = value
+        if len(readings) == 0:
+            return
+        record = {'device': address, 'model': device.get('model_code'), 'name': device.get('name'),
+                  'time': self.checkInTime(device), 'readings': readings}
+        with self.condition:
+            if len(self.queue) == self.queue.maxlen:
+                self.droppedCount += 1
+                METRICS.increment('acurite_publish_dropped')
+            self.queue.append(record)
+            self.condition.notify()
+
+    def forgetDevice(self, address):
+        for key in [key for key in self.lastPublished if key[0] == address]:
+            del self.lastPublished[key]
+
+    def nextBatch(self):
+        with self.condition:
+            while self.running and len(self.queue) == 0:
+                self.condition.wait()
+            if not self.running:
+                return None
+        time.sleep(BATCH_WINDOW)
+        with self.condition:
+            return [self.queue.popleft() for _ in range(min(self.batchSize, len(self.queue)))]
+
+    def run(self):
+        while True:
+            batch = self.nextBatch()
+            if batch is None:
+                break
+            try:
+                with METRICS.timer('acurite_publish_seconds'):
+                    self.sink.send(batch, self.messageFormat)
+                METRICS.increment('acurite_published_records', amount=len(batch))
+            except Exception as ex:
+                METRICS.increment('acurite_publish_errors')
+                LOGGER.error('Failed to publish {} records to {}: {}'.format(len(batch), self.target, ex))
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        try:
+            self.sink.close()
+        except Exception as ex:
+            LOGGER.error('Error closing publisher {}: {}'.format(self.target, ex))
@@ -0,0 +1,155 @@
+import argparse
+import copy
+import json
+import os
+import re
+
+import udi_interface
+
+from .AcuriteTransport import AcuriteTransport
+
+LOGGER = udi_interface.LOGGER
+
+HUB_PATH = re.compile(r'/accounts/[^/]+/dashboard/hubs/([^/?]+)$')
+HUBS_PATH = re.compile(r'/accounts/[^/]+/dashboard/hubs$')
+LOGIN_PATH = re.compile(r'/users/login$')
+REPLAY_TOKEN = 'replay-token'
+REPLAY_ACCOUNT = 'replay-account'
+
+SYNTHETIC_SENSORS = [('Temperature', 68.5, 'F'), ('Humidity', 45, '%'), ('Dew Point', 46.2, 'F'),
+                     ('Barometric Pressure', 29.92, 'inHg'), ('Wind Direction', 180, 'degrees'),
+                     ('Wind Speed', 4, 'mph'), ('Rainfall', 0.02, 'in'), ('LightIntensity', 12000, 'lux'),
+                     ('UVIndex', 3, 'UV'), ('WindSpeedAvg', 3, 'mph'), ('Feels Like', 68, 'F'),
+                     ('Heat Index', 0, 'F')]
+SYNTHETIC_WIRED_SENSORS = [('LightningStrikeCnt', 2, 'strikes'), ('LightningLastStrikeDist', 9, 'mi'),
+                           ('LightningClosestStrikeDist', 6, 'mi')]
+
+
+def fixtureName(url):
+    path = url.split('?')[0]
+    match = HUB_PATH.search(path)
+    if match is not None:
+        return 'hub_{}.json'.format(match.group(1))
+    if HUBS_PATH.search(path) is not None:
+        return 'hubs.json'
+    if LOGIN_PATH.search(path) is not None:
+        return 'login.json'
+    return None
+
+
+def redact(fixture, body):
+    # Recorded fixtures are meant to be shared, so drop the session token and account identity
+    if fixture == 'login.json' and isinstance(body, dict):
+        body = copy.deepcopy(body)
+        body['token_id'] = REPLAY_TOKEN
+        for accountUser in body.get('user', {}).get('account_users', []):
+            accountUser['account_id'] = REPLAY_ACCOUNT
+        for key in ('email', 'name', 'first_name', 'last_name'):
+            if key in body.get('user', {}):
+                body['user'][key] = 'redacted'
+    return body
+
+
+def writeFixture(fixtureDir, fixture, statusCode, headers, body):
+    os.makedirs(fixtureDir, exist_ok=True)
+    with open(os.path.join(fixtureDir, fixture), 'w') as fixtureFile:
+        json.dump({'status': statusCode, 'headers': headers, 'body': body}, fixtureFile, indent=2)
+
+
+class ReplayResponse():
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class RecordingTransport(AcuriteTransport):
+    """AcuriteTransport that also writes every login/hubs/hub response to fixtureDir for later replay."""
+
+    def __init__(self, fixtureDir, *args, **kwargs):
+        super(RecordingTransport, self).__init__(*args, **kwargs)
+        self.fixtureDir = fixtureDir
+
+    def request(self, method, url, **kwargs):
+        resp = super(RecordingTransport, self).request(method, url, **kwargs)
+        fixture = fixtureName(url)
+        if resp is not None and fixture is not None and resp.status_code == 200:
+            try:
+                headers = {'ETag': resp.headers['ETag']} if 'ETag' in resp.headers else {}
+                writeFixture(self.fixtureDir, fixture, resp.status_code, headers, redact(fixture, resp.json()))
+            except (OSError, ValueError) as e:
+                LOGGER.error('Unable to record {}: {}'.format(fixture, e))
+        return resp
+
+
+class ReplayTransport(AcuriteTransport):
+    """Serves recorded fixtures from fixtureDir in place of marapi.myacurite.com."""
+
+    def __init__(self, fixtureDir, *args, **kwargs):
+        super(ReplayTransport, self).__init__(*args, **kwargs)
+        self.fixtureDir = fixtureDir
+
+    def request(self, method, url, **kwargs):
+        fixture = fixtureName(url)
+        path = os.path.join(self.fixtureDir, fixture) if fixture is not None else None
+        if path is None or not os.path.exists(path):
+            return ReplayResponse(404, {}, b'{}')
+        with open(path) as fixtureFile:
+            recorded = json.load(fixtureFile)
+        return ReplayResponse(recorded['status'], recorded.get('headers', {}),
+                              json.dumps(recorded['body']).encode('utf-8'))
+
+
+def syntheticDevice(deviceId, model='Atlas'):
+    return {'id': deviceId,
+            'name': 'Synthetic {} {}'.format(model, deviceId),
+            'model_code': model,
+            'battery_level': 'Normal',
+            'status_code': 'green',
+            'last_check_in_at': '2021-10-06T12:00:00+00:00',
+            'sensors': [{'sensor_code': code, 'last_reading_value': value, 'chart_unit': unit}
+                        for code, value, unit in SYNTHETIC_SENSORS],
+            'wired_sensors': [{'sensor_code': code, 'last_reading_value': value, 'chart_unit': unit}
+                              for code, value, unit in SYNTHETIC_WIRED_SENSORS]}
+
+
+def writeSyntheticFleet(fixtureDir, deviceCount, hubCount=1, template=None):
+    """Writes login/hubs/hub fixtures for deviceCount devices spread across hubCount hubs.
+
+    template is a recorded device to clone; without one every device is a synthetic Atlas.
+    """
+    writeFixture(fixtureDir, 'login.json', 200, {},
+                 {'token_id': REPLAY_TOKEN, 'user': {'account_users': [{'account_id': REPLAY_ACCOUNT}]}})
+    hubIds = ['synthetic{}'.format(hubIndex + 1) for hubIndex in range(hubCount)]
+    writeFixture(fixtureDir, 'hubs.json', 200, {}, {'account_hubs': [{'id': hubId} for hubId in hubIds]})
+    for hubIndex, hubId in enumerate(hubIds):
+        devices = []
+        for deviceIndex in range(hubIndex, deviceCount, hubCount):
+            if template is not None:
+                device = copy.deepcopy(template)
+                device['id'] = 900000 + deviceIndex
+                device['name'] = '{} {}'.format(template.get('name', 'Device'), deviceIndex)
+            else:
+                device = syntheticDevice(900000 + deviceIndex)
+            devices.append(device)
+        writeFixture(fixtureDir, 'hub_{}.json'.format(hubId), 200, {}, {'devices': devices})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m acurite',
+                                     description='Write a synthetic replay fixture fleet for load testing.')
+    parser.add_argument('fixture_dir', help='directory to write login.json, hubs.json and hub_*.json to')
+    parser.add_argument('devices', type=int, help='number of devices')
+    parser.add_argument('--hubs', type=int, default=1, help='number of hubs to spread the devices across')
+    parser.add_argument('--template', help='recorded hub fixture whose first device every device is cloned from')
+    args = parser.parse_args(argv)
+
+    template = None
+    if args.template is not None:
+        with open(args.template) as templateFile:
+            template = json.load(templateFile)['body']['devices'][0]
+    writeSyntheticFleet(args.fixture_dir, args.devices, args.hubs, template)
+    print('Wrote {} devices across {} hubs to {}'.format(args.devices, args.hubs, args.fixture_dir))
@@ -0,0 +1,264 @@
+import json
+import math
+import socket
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+import udi_interface
+
+from .Metrics import METRICS
+from .LogUtil import debug
+
+LOGGER = udi_interface.LOGGER
+
+# hub_id given to radio devices, so the controller can tell them apart from cloud devices
+LOCAL_HUB_ID = 'rtl_433'
+UDP_BUFFER_SIZE = 65536
+STOP_POLL_INTERVAL = 1.0
+
+# rtl_433 model name -> AcuRite cloud model_code, so the radio devices get the same nodedefs as the cloud ones
+RTL433_MODELS = {
+    'Acurite-Atlas': 'Atlas',
+    'Acurite-6045M': 'LightningT',
+}
+
+
+def celsiusToFahrenheit(value):
+    return value * 9.0 / 5.0 + 32.0
+
+
+def dewPoint(temperatureF, humidity):
+    # Magnus approximation, good to a fraction of a degree over normal outdoor conditions
+    if humidity <= 0:
+        return None
+    temperatureC = (temperatureF - 32.0) * 5.0 / 9.0
+    gamma = math.log(humidity / 100.0) + 17.62 * temperatureC / (243.12 + temperatureC)
+    return round(celsiusToFahrenheit(243.12 * gamma / (17.62 - gamma)), 1)
+
+
+# (sensor_code, chart_unit, [(rtl_433 field, conversion or None), ...]) - the first field present wins
+READINGS = [
+    ('Temperature', 'F', [('temperature_F', None), ('temperature_C', celsiusToFahrenheit)]),
+    ('Humidity', '%', [('humidity', None)]),
+    ('Wind Speed', 'mph', [('wind_avg_mi_h', None), ('wind_avg_km_h', lambda value: value / 1.609344)]),
+    ('Wind Direction', 'degrees', [('wind_dir_deg', None)]),
+    ('UVIndex', 'UV', [('uv', None)]),
+    ('LightIntensity', 'lux', [('lux', None)]),
+    ('LightningLastStrikeDist', 'mi', [('strike_distance', None), ('storm_dist_mi', None),
+                                       ('storm_dist_km', lambda value: value / 1.609344), ('storm_dist', None)]),
+]
+
+# Cumulative radio counters reported the way the cloud does: as a running total since local midnight
+DAILY_COUNTERS = [
+    ('Rainfall', 'in', [('rain_in', None), ('rain_mm', lambda value: value / 25.4)]),
+    ('LightningStrikeCnt', 'strikes', [('strike_count', None)]),
+]
+
+
+def readField(message, fields):
+    for field, convert in fields:
+        value = message.get(field)
+        if isinstance(value, (int, float)):
+            return value if convert is None else convert(value)
+    return None
+
+
+class DailyCounter():
+    """Turns a free-running counter that may wrap or reset into a total since the start of the local day."""
+
+    def __init__(self):
+        self.day = None
+        self.lastRaw = None
+        self.total = 0.0
+
+    def update(self, raw, day):
+        if self.day != day:
+            self.day = day
+            self.total = 0.0
+        elif self.lastRaw is not None:
+            # A lower reading means the counter wrapped or the sensor was reset and has counted raw since then
+            self.total += raw - self.lastRaw if raw >= self.lastRaw else raw
+        self.lastRaw = raw
+        return round(self.total, 3)
+
+
+class Rtl433Decoder():
+    """Folds rtl_433 JSON messages into AcuRite cloud style device payloads, one merged payload per radio device."""
+
+    def __init__(self):
+        self.devices = {}
+        self.counters = {}
+        self.closestStrikes = {}
+
+    @staticmethod
+    def deviceAddress(message):
+        return 'r{}'.format(message.get('id'))
+
+    def decode(self, message, now=None):
+        """Returns the updated device payload for an AcuRite message, or None when the message isn't one."""
+        modelCode = RTL433_MODELS.get(message.get('model'))
+        if modelCode is None or message.get('id') is None:
+            return None
+        now = time.time() if now is None else now
+        address = self.deviceAddress(message)
+        day = datetime.fromtimestamp(now).date()
+
+        device = self.devices.get(address)
+        if device is None:
+            device = {'id': address, 'address': address, 'name': 'AcuRite {} {}'.format(modelCode, message['id']),
+                      'model_code': modelCode, 'status_code': 'green', 'hub_id': LOCAL_HUB_ID, 'sensors': []}
+            self.devices[address] = device
+        readings = {sensor['sensor_code']: sensor for sensor in device['sensors']}
+
+        def setReading(sensorCode, unit, value):
+            readings[sensorCode] = {'sensor_code': sensorCode, 'last_reading_value': value, 'chart_unit': unit}
+
+        # Atlas messages rotate through subsets of the readings, so only overwrite what this one carries
+        for sensorCode, unit, fields in READINGS:
+            value = readField(message, fields)
+            if value is not None:
+                setReading(sensorCode, unit, round(value, 2))
+        for sensorCode, unit, fields in DAILY_COUNTERS:
+            value = readField(message, fields)
+            if value is not None:
+                counter = self.counters.setdefault((address, sensorCode), DailyCounter())
+                setReading(sensorCode, unit, counter.update(value, day))
+
+        strikeDistance = readings.get('LightningLastStrikeDist')
+        strikeCount = readings.get('LightningStrikeCnt')
+        if strikeDistance is not None and strikeCount is not None and strikeCount['last_reading_value'] > 0:
+            closest = self.closestStrikes.get(address)
+            if closest is None or closest[0] != day or strikeDistance['last_reading_value'] < closest[1]:
+                closest = (day, strikeDistance['last_reading_value'])
+                self.closestStrikes[address] = closest
+            setReading('LightningClosestStrikeDist', 'mi', closest[1])
+
+        temperature = readings.get('Temperature')
+        humidity = readings.get('Humidity')
+        if temperature is not None and humidity is not None:
+            value = dewPoint(temperature['last_reading_value'], humidity['last_reading_value'])
+            if value is not None:
+                setReading('Dew Point', 'F', value)
+
+        if 'battery_ok' in message:
+            device['battery_level'] = 'Normal' if message['battery_ok'] else 'Low'
+        device.setdefault('battery_level', 'Normal')
+        device['sensors'] = list(readings.values())
+        device['last_check_in_at'] = datetime.fromtimestamp(now, timezone.utc).isoformat()
+        return device
+
+
+class Rtl433Source():
+    """Reads rtl_433 JSON lines from UDP, stdin or a replay file and pushes each decoded device as it arrives.
+
+    spec is udp:[host:]port, stdin, or file:path[:speed] where speed scales the recorded gaps between lines
+    (0 replays as fast as possible).
+    """
+
+    def __init__(self, spec, onDevice):
+        self.spec = spec
+        self.onDevice = onDevice
+        self.decoder = Rtl433Decoder()
+        self.running = False
+        self.thread = None
+
+    @staticmethod
+    def isValidSpec(spec):
+        kind = str(spec).split(':', 1)[0].lower()
+        return kind in ('udp', 'stdin', 'file')
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='acurite-rtl433', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def run(self):
+        kind, _, target = str(self.spec).partition(':')
+        kind = kind.lower()
+        LOGGER.info('Reading rtl_433 messages from {}'.format(self.spec))
+        try:
+            if kind == 'udp':
+                self.readUdp(target)
+            elif kind == 'stdin':
+                self.readLines(sys.stdin, 0)
+            elif kind == 'file':
+                path, speed = self.parseFileTarget(target)
+                with open(path, 'r') as replayFile:
+                    self.readLines(replayFile, speed)
+            else:
+                LOGGER.error('Unknown rtl_433 source: {}'.format(self.spec))
+        except Exception as ex:
+            LOGGER.error('rtl_433 source {} failed: {}'.format(self.spec, ex))
+        self.running = False
+
+    @staticmethod
+    def parseFileTarget(target):
+        path, _, speed = target.rpartition(':')
+        try:
+            return path, float(speed)
+        except ValueError:
+            return target, 1.0
+
+    def readUdp(self, target):
+        host, _, port = target.rpartition(':')
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udpSocket:
+            udpSocket.bind((host if len(host) > 0 else '0.0.0.0', int(port)))
+            udpSocket.settimeout(STOP_POLL_INTERVAL)
+            while self.running:
+                try:
+                    datagram = udpSocket.recv(UDP_BUFFER_SIZE)
+                except socket.timeout:
+                    continue
+                # rtl_433 -F syslog wraps each JSON line in a syslog header, so start at the first brace
+                text = datagram.decode('utf-8', errors='replace')
+                self.handleLine(text[text.find('{'):] if '{' in text else text)
+
+    def readLines(self, lines, speed):
+        lastTime = None
+        for line in lines:
+            if not self.running:
+                break
+            message = self.handleLine(line)
+            if speed > 0 and message is not None:
+                # Keep the recorded pacing between messages so a replay behaves like a live radio
+                messageTime = self.messageTime(message)
+                if messageTime is not None and lastTime is not None and messageTime > lastTime:
+                    time.sleep((messageTime - lastTime) / speed)
+                lastTime = messageTime if messageTime is not None else lastTime
+
+    @staticmethod
+    def messageTime(message):
+        try:
+            return datetime.fromisoformat(str(message.get('time'))).timestamp()
+        except ValueError:
+            return None
+
+    def handleLine(self, line):
+        line = line.strip()
+        if len(line) == 0:
+            return None
+        try:
+            message = json.loads(line)
+        except ValueError:
+            METRICS.increment('acurite_parse_errors', {'stage': 'rtl433'})
+            debug('Ignoring non-JSON rtl_433 line: {}', line)
+            return None
+        if not isinstance(message, dict):
+            return None
+        device = self.decoder.decode(message)
+        if device is None:
+            return message
+        METRICS.increment('acurite_rtl433_messages', {'model': device['model_code']})
+        try:
+            # Hand over a copy so the consumer never sees the decoder merge the next message into it
+            self.onDevice(dict(device, sensors=list(device['sensors'])))
+        except Exception as ex:
+            LOGGER.error('rtl_433 device update failed: {}'.format(ex))
+        return message
@@ -0,0 +1,38 @@
+SENSOR_GROUPS = ('sensors', 'wired_sensors')
+
+
+class SensorIndex():
+    """Indexes a device payload's sensors and wired_sensors by sensor_code in a single pass."""
+
+    def __init__(self, device):
+        self.sensors = {}
+        for group in SENSOR_GROUPS:
+            for sensor in device.get(group) or []:
+                # Keep the first reading for a code, matching the old jsonpath find()[0] behaviour
+                self.sensors.setdefault(sensor.get('sensor_code'), sensor)
+
+    def has(self, sensorCode):
+        return sensorCode in self.sensors
+
+    def value(self, sensorCode, default=None):
+        sensor = self.sensors.get(sensorCode)
+        return default if sensor is None else sensor.get('last_reading_value', default)
+
+    def unit(self, sensorCode, default=None):
+        sensor = self.sensors.get(sensorCode)
+        return default if sensor is None else sensor.get('chart_unit', default)
+
+    def firstPositive(self, sensorCodes):
+        """Returns the sensor code and value of the first sensor in sensorCodes reading above zero."""
+        for sensorCode in sensorCodes:
+            value = self.value(sensorCode)
+            if value is not None and int(value) > 0:
+                return sensorCode, value
+        return None, 0
+
+    def extract(self, sensorDrivers):
+        """Yields (driver, sensor code, value, unit) for every mapped sensor present in the payload."""
+        for driver, sensorCode in sensorDrivers:
+            sensor = self.sensors.get(sensorCode)
+            if sensor is not None:
+                yield driver, sensorCode, sensor.get('last_reading_value'), sensor.get('chart_unit')
@@ -0,0 +1,88 @@
+import threading
+import time
+
+import udi_interface
+
+from .Metrics import METRICS
+
+LOGGER = udi_interface.LOGGER
+
+SKIP = 'skip'
+COALESCE = 'coalesce'
+QUEUE_ONE = 'queue-one'
+POLICIES = (SKIP, COALESCE, QUEUE_ONE)
+# A flight that hasn't landed by now is assumed lost (e.g. a dropped async result) and may be replaced
+FLIGHT_TIMEOUT = 5 * 60
+
+
+class SingleFlight():
+    """Lets one fetch run at a time and applies an overrun policy to callers that arrive while it is in flight.
+
+    skip      - the caller is turned away, its fetch is simply missed
+    coalesce  - the caller shares the fetch in flight, waiting for it to land when it asks to wait
+    queue-one - one more fetch runs as soon as the current one lands, however many callers asked for it
+    """
+
+    def __init__(self, policy=COALESCE, flightTimeout=FLIGHT_TIMEOUT):
+        self.policy = policy
+        self.flightTimeout = flightTimeout
+        self.inFlight = False
+        self.queued = False
+        self.startTime = 0
+        self.flights = 0
+        # Token of the flight in the air; a token is never reused, so an owner that was given up on can't end
+        # the flight that replaced it
+        self.token = None
+        self.tokens = 0
+        self.condition = threading.Condition()
+
+    def begin(self, caller, wait=False):
+        """Returns a token when the caller owns a new flight and must pass it to end() once it has landed,
+        or None when another flight is in the air."""
+        with self.condition:
+            now = time.monotonic()
+            if self.inFlight and now - self.startTime >= self.flightTimeout:
+                LOGGER.error('Fetch in flight for {:.0f}s never completed, starting a new one'.format(now - self.startTime))
+                self.land()
+            if not self.inFlight:
+                self.inFlight = True
+                self.startTime = now
+                self.tokens += 1
+                self.token = self.tokens
+                return self.token
+
+            METRICS.increment('acurite_poll_overruns', {'policy': self.policy})
+            LOGGER.warning('{} missed its deadline, a fetch has been in flight for {:.1f}s ({})'.format(
+                caller, now - self.startTime, self.policy))
+            if self.policy == QUEUE_ONE:
+                self.queued = True
+            elif self.policy == COALESCE and wait:
+                flight = self.flights
+                remaining = self.flightTimeout - (now - self.startTime)
+                while self.inFlight and self.flights == flight and remaining > 0:
+                    self.condition.wait(remaining)
+                    remaining = self.flightTimeout - (time.monotonic() - self.startTime)
+            return None
+
+    def end(self, token):
+        """Lands the flight token; returns True when a queued fetch should run now as the same flight.
+
+        A token that timed out and was replaced is ignored, the flight in the air now is not its to land.
+        """
+        with self.condition:
+            if not self.inFlight or token != self.token:
+                LOGGER.warning('Fetch given up on after {}s finally completed'.format(self.flightTimeout))
+                return False
+            METRICS.observe('acurite_flight_seconds', time.monotonic() - self.startTime)
+            if self.queued:
+                self.queued = False
+                self.startTime = time.monotonic()
+                return True
+            self.land()
+            return False
+
+    def land(self):
+        self.inFlight = False
+        self.token = None
+        self.flights += 1
+        self.condition.notify_all()
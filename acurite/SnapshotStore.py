@@ -0,0 +1,92 @@
+import json
+import os
+import threading
+import time
+
+import udi_interface
+
+LOGGER = udi_interface.LOGGER
+
+# Tags that only describe a single fetch and mean nothing once the payload is served from the cache
+TRANSIENT_KEYS = ('unchanged', 'cached')
+
+
+class SnapshotStore():
+    """Last good payload of every device, kept in memory and persisted to a JSON file so it outlives an outage."""
+
+    def __init__(self, path):
+        self.path = path
+        self.devices = {}
+        self.savedAt = None
+        self.lock = threading.Lock()
+
+    def load(self):
+        """Merges the snapshot file into memory and returns copies of the devices it added, tagged cached.
+
+        Devices already in memory were fetched since the file was written, so they are never replaced.
+        """
+        if self.path is None or not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path, 'r') as snapshotFile:
+                snapshot = json.load(snapshotFile)
+            devices = []
+            with self.lock:
+                for device in snapshot['devices']:
+                    if device['address'] not in self.devices:
+                        self.devices[device['address']] = device
+                        devices.append(dict(device, cached=True))
+                self.savedAt = snapshot.get('saved_at')
+            LOGGER.info('Loaded {} cached devices from {}'.format(len(devices), self.path))
+            return devices
+        except (OSError, ValueError, KeyError, TypeError) as ex:
+            LOGGER.error('Unable to load device snapshot {}: {}'.format(self.path, ex))
+            return []
+
+    def update(self, devices):
+        """Merges freshly fetched devices into the snapshot, returning True when anything new was cached."""
+        changed = False
+        with self.lock:
+            for device in devices:
+                address = device['address']
+                if device.get('unchanged', False) and address in self.devices:
+                    continue
+                self.devices[address] = {key: value for key, value in device.items() if key not in TRANSIENT_KEYS}
+                changed = True
+        return changed
+
+    def remove(self, addresses):
+        """Drops devices the account no longer reports, returning True when any were held."""
+        removed = False
+        with self.lock:
+            for address in addresses:
+                if self.devices.pop(address, None) is not None:
+                    removed = True
+        return removed
+
+    def cachedDevices(self):
+        """Returns copies of every device held, tagged cached."""
+        with self.lock:
+            return [dict(device, cached=True) for device in self.devices.values()]
+
+    def get(self, address):
+        with self.lock:
+            return self.devices.get(address)
+
+    def save(self):
+        if self.path is None:
+            return
+        with self.lock:
+            snapshot = {'saved_at': time.time(), 'devices': list(self.devices.values())}
+        # Write beside the target and swap it in, so a crash mid-write never leaves a truncated snapshot
+        tempPath = self.path + '.tmp'
+        try:
+            directory = os.path.dirname(self.path)
+            if len(directory) > 0:
+                os.makedirs(directory, exist_ok=True)
+            with open(tempPath, 'w') as snapshotFile:
+                json.dump(snapshot, snapshotFile, separators=(',', ':'))
+            os.replace(tempPath, self.path)
+            self.savedAt = snapshot['saved_at']
+        except (OSError, TypeError, ValueError) as ex:
+            LOGGER.error('Unable to save device snapshot {}: {}'.format(self.path, ex))
@@ -0,0 +1,183 @@
+import math
+import threading
+import time
+from collections import deque
+
+import udi_interface
+
+from .Metrics import METRICS
+from .SensorIndex import SensorIndex
+
+LOGGER = udi_interface.LOGGER
+
+BURST_INTERVAL = 20
+# A hub leaves burst mode once it has seen no new strikes for this long
+QUIET_PERIOD = 15 * 60
+MAX_CALLS_PER_HOUR = 60
+BUDGET_WINDOW = 60 * 60
+STRIKE_COUNT = 'LightningStrikeCnt'
+CLOSEST_STRIKE = 'LightningClosestStrikeDist'
+
+
+class CallBudget():
+    """Sliding-window cap on the number of calls made in the last window seconds."""
+
+    def __init__(self, limit, window=BUDGET_WINDOW):
+        self.limit = limit
+        self.window = window
+        self.calls = deque()
+
+    def tryAcquire(self, now):
+        while len(self.calls) > 0 and self.calls[0] <= now - self.window:
+            self.calls.popleft()
+        if len(self.calls) >= self.limit:
+            return False
+        self.calls.append(now)
+        return True
+
+    def nextAvailable(self, now):
+        return now if len(self.calls) < self.limit else self.calls[0] + self.window
+
+
+class StormMonitor():
+    """Detects lightning activity per hub and fetches active hubs on a fast, decaying schedule.
+
+    A hub enters burst mode when a device's strike count rises or its closest strike gets closer. While in
+    burst mode the hub is fetched every burstInterval, doubling with each fetch that brings no new strikes,
+    until it has been quiet for quietPeriod. Burst fetches never exceed maxCallsPerHour.
+    """
+
+    def __init__(self, fetchHub, onChange, burstInterval=BURST_INTERVAL, quietPeriod=QUIET_PERIOD,
+                 maxCallsPerHour=MAX_CALLS_PER_HOUR):
+        self.fetchHub = fetchHub
+        self.onChange = onChange
+        self.burstInterval = burstInterval
+        self.quietPeriod = quietPeriod
+        self.budget = CallBudget(maxCallsPerHour)
+        self.enabled = False
+        self.lastReadings = {}
+        # hub key -> {'lastActivity', 'nextFetch', 'quietFetches'}
+        self.bursts = {}
+        self.condition = threading.Condition()
+        self.thread = None
+        self.running = False
+
+    def configure(self, enabled, maxCallsPerHour):
+        with self.condition:
+            self.enabled = enabled and maxCallsPerHour > 0
+            self.budget.limit = maxCallsPerHour
+            wasActive = len(self.bursts) > 0
+            if not self.enabled:
+                self.bursts.clear()
+            elif self.thread is None:
+                self.running = True
+                self.thread = threading.Thread(target=self.run, name='acurite-storm', daemon=True)
+                self.thread.start()
+            self.condition.notify()
+        if wasActive and not self.enabled:
+            self.onChange(False)
+
+    def isActive(self):
+        with self.condition:
+            return len(self.bursts) > 0
+
+    def observe(self, devices, now=None, pushed=False):
+        """Feeds fetched devices in; returns the hubs that just entered burst mode.
+
+        Pushed devices report on their own as readings change, so their hubs count towards the storm state but
+        are never fetched.
+        """
+        now = time.monotonic() if now is None else now
+        activeHubs = set()
+        for device in devices:
+            sensorIndex = SensorIndex(device)
+            if not sensorIndex.has(STRIKE_COUNT):
+                continue
+            strikeCount = sensorIndex.value(STRIKE_COUNT, 0)
+            closestStrike = sensorIndex.value(CLOSEST_STRIKE, 0)
+            last = self.lastReadings.get(device['address'])
+            self.lastReadings[device['address']] = (strikeCount, closestStrike)
+            # The first reading is only a baseline, and a lower count is the midnight reset
+            if last is None or strikeCount < last[0]:
+                continue
+            if strikeCount > last[0] or (0 < closestStrike < last[1]):
+                activeHubs.add((device.get('account'), device.get('hub_id')))
+
+        if not self.enabled or len(activeHubs) == 0:
+            return []
+        nextFetch = math.inf if pushed else now + self.burstInterval
+        started = []
+        with self.condition:
+            wasActive = len(self.bursts) > 0
+            for hubKey in activeHubs:
+                burst = self.bursts.get(hubKey)
+                if burst is None:
+                    started.append(hubKey)
+                    self.bursts[hubKey] = {'lastActivity': now, 'nextFetch': nextFetch,
+                                           'quietFetches': 0}
+                    METRICS.increment('acurite_storm_bursts')
+                    if pushed:
+                        LOGGER.info('Lightning detected on hub {}'.format(hubKey[1]))
+                    else:
+                        LOGGER.info('Lightning detected on hub {}, fetching every {}s'.format(hubKey[1],
+                                                                                             self.burstInterval))
+                else:
+                    burst['lastActivity'] = now
+                    burst['quietFetches'] = 0
+                    burst['nextFetch'] = min(burst['nextFetch'], nextFetch)
+            self.condition.notify()
+        if not wasActive:
+            self.onChange(True)
+        return started
+
+    def nextDue(self, now):
+        """Drops bursts that went quiet and returns (due hub keys, whether any burst ended)."""
+        ended = False
+        for hubKey in list(self.bursts):
+            if now - self.bursts[hubKey]['lastActivity'] >= self.quietPeriod:
+                LOGGER.info('No lightning on hub {} for {}s, back to normal polling'.format(hubKey[1], self.quietPeriod))
+                del self.bursts[hubKey]
+                ended = True
+        return [hubKey for hubKey, burst in self.bursts.items() if burst['nextFetch'] <= now], ended
+
+    def nextWait(self, now):
+        """Seconds until a burst is next due or goes quiet, or None with no bursts running."""
+        wakeups = [min(burst['nextFetch'], burst['lastActivity'] + self.quietPeriod) for burst in self.bursts.values()]
+        return max(0.0, min(wakeups) - now) if len(wakeups) > 0 else None
+
+    def run(self):
+        while True:
+            with self.condition:
+                if not self.running:
+                    return
+                now = time.monotonic()
+                due, ended = self.nextDue(now)
+                fetches = []
+                for hubKey in due:
+                    burst = self.bursts[hubKey]
+                    if not self.budget.tryAcquire(now):
+                        burst['nextFetch'] = self.budget.nextAvailable(now)
+                        METRICS.increment('acurite_storm_budget_exhausted')
+                        LOGGER.info('Storm fetch budget of {}/hour used up, hub {} waits'.format(
+                            self.budget.limit, hubKey[1]))
+                        continue
+                    burst['quietFetches'] += 1
+                    burst['nextFetch'] = now + self.burstInterval * (2 ** (burst['quietFetches'] - 1))
+                    fetches.append(hubKey)
+                active = len(self.bursts) > 0
+                if len(fetches) == 0 and not ended:
+                    # Only now, after the budget pushed back any hub it had to, is the next wakeup known
+                    self.condition.wait(self.nextWait(now))
+                    continue
+            if ended and not active:
+                self.onChange(False)
+            for hubKey in fetches:
+                try:
+                    self.fetchHub(hubKey)
+                except Exception as ex:
+                    LOGGER.error('Storm fetch for hub {} failed: {}'.format(hubKey[1], ex))
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
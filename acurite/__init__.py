@@ -1 +1,20 @@
 from .AcuriteManager import AcuriteManager
+from .AcuriteTransport import AcuriteTransport
+from .SensorIndex import SensorIndex
+from .DriverReporter import DriverReporter
+from .NodeTracker import NodeTracker
+from .AccountPool import AccountPool
+from .PollScheduler import PollScheduler
+from .AsyncAcuriteManager import AsyncAcuriteManager
+from .AsyncPollEngine import AsyncPollEngine
+from .HistoryStore import HistoryStore
+from .DerivedMetrics import DerivedMetrics
+from .Metrics import METRICS, Metrics
+from .ReplayTransport import RecordingTransport, ReplayTransport, writeSyntheticFleet
+from .LogUtil import LazyJson, PayloadSampler
+from .SnapshotStore import SnapshotStore
+from .CircuitBreaker import CircuitBreaker
+from .Rtl433Source import Rtl433Decoder, Rtl433Source
+from .ReadingPublisher import ReadingPublisher
+from .StormMonitor import StormMonitor
+from .SingleFlight import SingleFlight
@@ -0,0 +1,3 @@
+from .ReplayTransport import main
+
+main()
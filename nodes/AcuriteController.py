@@ -1,15 +1,35 @@
 # !/usr/bin/env python
+import os
+import queue
+import re
+import threading
 import time
-import json
 
 import udi_interface
 
 import nodes
-from acurite import AcuriteManager
+from acurite import AccountPool, AsyncAcuriteManager, AsyncPollEngine, CircuitBreaker, DriverReporter, HistoryStore, \
+    METRICS, NodeTracker, PollScheduler, ReadingPublisher, Rtl433Source, SingleFlight, SnapshotStore, StormMonitor
+from acurite.AccountPool import PRIMARY_ACCOUNT
+from acurite.LogUtil import LazyJson, PayloadSampler, debug
+from acurite.ReadingPublisher import FORMATS
+from acurite.Rtl433Source import LOCAL_HUB_ID
+from acurite.SingleFlight import COALESCE, POLICIES
+from acurite.CircuitBreaker import CLOSED
+from acurite.StormMonitor import MAX_CALLS_PER_HOUR
+from acurite.AcuriteTransport import DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT, DEFAULT_MAX_RETRIES
 
 LOGGER = udi_interface.LOGGER
 Custom = udi_interface.Custom
 
+NODE_ADD_TIMEOUT = 30
+QUERY_REFRESH_INTERVAL = 60
+DEFAULT_HISTORY_DIR = 'history'
+DEFAULT_SNAPSHOT_FILE = 'snapshot.json'
+STOP_PROCESSING = object()
+EXTRA_USER_PARAM = re.compile(r'^acurite_user_(\d+)$')
+PROFILE_VERSION_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'profile', 'version.txt')
+
 
 class AcuriteController(udi_interface.Node):
     def __init__(self, polyglot, primary, address, name):
@@ -19,28 +39,112 @@ class AcuriteController(udi_interface.Node):
         self.primary = primary
         self.address = address
         self.configured = False
-        self.nodesAddedCount = 0
-        self.deviceCount = 0
+        self.startTime = time.monotonic()
+        self.populated = False
+        self.nodeTracker = NodeTracker()
+        self.accountPool = AccountPool()
+        self.driverReporter = DriverReporter()
+        self.pollScheduler = PollScheduler()
+        self.adaptivePoll = False
+        self.forceUpdate = False
+        self.resultQueue = queue.Queue()
+        self.asyncEngine = None
+        self.historyStore = None
+        self.nodeIndex = {}
+        self.payloadSampler = PayloadSampler()
+        self.discoveryPending = True
+        self.snapshotStore = SnapshotStore(DEFAULT_SNAPSHOT_FILE)
+        self.circuitBreaker = CircuitBreaker()
+        self.localSource = None
+        self.localAddresses = set()
+        self.publisher = None
+        self.stormMonitor = StormMonitor(self.refreshHub, self.stormChanged)
+        self.fetchFlight = SingleFlight()
+        self.queryRefresh = False
+        self.queryRefreshInterval = QUERY_REFRESH_INTERVAL
+        self.hubRefreshTimes = {}
+        self.refreshLock = threading.Lock()
+        self.applyLock = threading.Lock()
 
         self.Notices = Custom(polyglot, 'notices')
         self.Parameters = Custom(polyglot, 'customparams')
+        self.CustomData = Custom(polyglot, 'customdata')
 
         self.poly.subscribe(self.poly.CUSTOMPARAMS, self.parameterHandler)
+        self.poly.subscribe(self.poly.CUSTOMDATA, self.dataHandler)
         self.poly.subscribe(self.poly.START, self.start, address)
         self.poly.subscribe(self.poly.POLL, self.poll)
         self.poly.subscribe(self.poly.ADDNODEDONE, self.nodeHandler)
+        self.poly.subscribe(self.poly.STOP, self.stop)
 
         self.poly.ready()
         self.poly.addNode(self)
 
     def start(self):
-        self.poly.updateProfile()
+        self.updateProfile()
         self.poly.setCustomParamsDoc()
-        self.query()
+        # Nodes come back from the snapshot first, so the first live fetch never holds up the start handler
+        threading.Thread(target=self.warmStart, name='acurite-start', daemon=True).start()
         LOGGER.info('Started udi-acurite-poly NodeServer')
 
+    def warmStart(self):
+        self.restoreSnapshot()
+        self.fetchDevices('Startup')
+
+    def updateProfile(self):
+        try:
+            with open(PROFILE_VERSION_FILE, 'r') as versionFile:
+                profileVersion = versionFile.read().strip()
+        except OSError as ex:
+            LOGGER.error('Unable to read profile version: {}'.format(ex))
+            profileVersion = None
+        if profileVersion is not None and profileVersion == self.CustomData['profile_version']:
+            LOGGER.info('Profile {} is already installed'.format(profileVersion))
+            return
+        self.poly.updateProfile()
+        if profileVersion is not None:
+            self.CustomData['profile_version'] = profileVersion
+
+    def restoreSnapshot(self):
+        """Creates and populates nodes from the last saved payloads before anything is fetched."""
+        # Held like processDevices, so a parameter change fetch can't create or update nodes at the same time
+        with self.applyLock:
+            if self.populated:
+                LOGGER.info('Nodes already populated by a live fetch, skipping the snapshot restore')
+                return
+            # The snapshot_file parameter may already have merged the file in, so restore everything the store holds
+            self.snapshotStore.load()
+            devices = self.snapshotStore.cachedDevices()
+            if len(devices) == 0:
+                return
+            self.localAddresses.update(device['address'] for device in devices
+                                       if device.get('hub_id') == LOCAL_HUB_ID)
+            try:
+                with METRICS.timer('acurite_restore_seconds'):
+                    # Treated as partial so nothing is pruned; the first live fetch still runs a full discovery
+                    self.syncNodes(devices, True)
+                    with self.driverReporter.batch():
+                        for device in devices:
+                            deviceNode = self.nodeIndex.get(device['address'])
+                            if deviceNode is not None:
+                                self.updateNode(deviceNode, device)
+                self.markPopulated('snapshot')
+            except Exception as ex:
+                LOGGER.error('AcuriteController - Restoring snapshot failed with error: {}'.format(ex))
+
+    def markPopulated(self, source):
+        if self.populated:
+            return
+        self.populated = True
+        elapsed = time.monotonic() - self.startTime
+        METRICS.observe('acurite_time_to_populated_seconds', elapsed, {'source': source})
+        LOGGER.info('Drivers populated from {} {:.2f}s after startup'.format(source, elapsed))
+
     def nodeHandler(self, data):
-        self.nodesAddedCount += 1
+        self.nodeTracker.nodeAdded(data)
+
+    def dataHandler(self, data):
+        self.CustomData.load(data)
 
     def parameterHandler(self, params):
         self.Parameters.load(params)
@@ -61,112 +165,508 @@ class AcuriteController(udi_interface.Node):
         else:
             LOGGER.error('Acurite Password is Blank')
 
+        self.driverReporter.deadbands = DriverReporter.parseDeadbands(self.Parameters['deadbands'])
+        self.adaptivePoll = self.parseBoolParam('adaptive_poll', False)
+        self.fetchFlight.policy = self.parsePollOverrunParam()
+        self.queryRefresh = self.parseBoolParam('query_refresh', False)
+        self.queryRefreshInterval = self.parseNumberParam('query_refresh_interval', QUERY_REFRESH_INTERVAL, float)
+        self.stormMonitor.configure(self.parseBoolParam('storm_burst', False),
+                                    self.parseNumberParam('storm_max_calls', MAX_CALLS_PER_HOUR, int))
+        self.configureHistory()
+        self.configureSnapshot()
+        self.configureMetrics()
+        self.payloadSampler.configure(self.Parameters['payload_dump'])
+
         self.Notices.clear()
+        self.configureLocalSource()
+        self.configurePublisher()
 
         if userValid and passwordValid:
             self.configured = True
-            self.query()
+            credentials = {PRIMARY_ACCOUNT: (acuriteUser, acuritePassword)}
+            credentials.update(self.parseExtraCredentials())
+            self.accountPool.configure(
+                credentials,
+                self.parseNumberParam('connect_timeout', DEFAULT_CONNECT_TIMEOUT, float),
+                self.parseNumberParam('read_timeout', DEFAULT_READ_TIMEOUT, float),
+                self.parseNumberParam('max_retries', DEFAULT_MAX_RETRIES, int),
+                self.parseAsyncEngineParam(),
+                self.parseFixtureParam())
+            self.fetchDevices('Parameter change')
+        elif self.localSource is not None:
+            LOGGER.info('No Acurite account configured, using rtl_433 only')
         else:
             if not userValid:
                 self.Notices['user'] = 'Acurite User must be configured.'
             if not passwordValid:
                 self.Notices['password'] = 'Acurite Password must be configured.'
 
+    def parseExtraCredentials(self):
+        # Additional accounts are configured as acurite_user_N / acurite_password_N, N >= 2
+        credentials = {}
+        for key in self.Parameters.keys():
+            match = EXTRA_USER_PARAM.match(key)
+            if match is None:
+                continue
+            accountNumber = int(match.group(1))
+            acuriteUser = self.Parameters[key]
+            acuritePassword = self.Parameters['acurite_password_{}'.format(accountNumber)]
+            if accountNumber <= PRIMARY_ACCOUNT or acuriteUser is None or len(acuriteUser) == 0:
+                continue
+            if acuritePassword is None or len(acuritePassword) == 0:
+                LOGGER.error('Acurite Password {} is Blank'.format(accountNumber))
+                self.Notices['password_{}'.format(accountNumber)] = \
+                    'Acurite Password {} must be configured.'.format(accountNumber)
+                continue
+            credentials[accountNumber] = (acuriteUser, acuritePassword)
+        return credentials
+
+    def configureMetrics(self):
+        metricsPort = self.parseNumberParam('metrics_port', 0, int)
+        if metricsPort > 0:
+            METRICS.startServer(metricsPort)
+        else:
+            METRICS.stopServer()
+
+    def configureHistory(self):
+        historyDays = self.parseNumberParam('history_days', 0, int)
+        if historyDays <= 0:
+            self.historyStore = None
+            return
+        historyDir = self.Parameters['history_dir']
+        if historyDir is None or len(historyDir) == 0:
+            historyDir = DEFAULT_HISTORY_DIR
+        if self.historyStore is None or self.historyStore.rootDir != historyDir:
+            try:
+                self.historyStore = HistoryStore(historyDir, historyDays)
+            except OSError as ex:
+                LOGGER.error('Unable to open history store {}: {}'.format(historyDir, ex))
+                self.historyStore = None
+                return
+        self.historyStore.retentionDays = historyDays
+
+    def configureSnapshot(self):
+        snapshotFile = self.Parameters['snapshot_file']
+        if snapshotFile is None or len(snapshotFile) == 0:
+            snapshotFile = DEFAULT_SNAPSHOT_FILE
+        if snapshotFile != self.snapshotStore.path:
+            # Merge the new file in rather than overwrite it; the next save writes both back
+            self.snapshotStore.path = snapshotFile
+            self.snapshotStore.load()
+
+    def configureLocalSource(self):
+        sourceSpec = self.Parameters['rtl433_source']
+        if sourceSpec is None or len(str(sourceSpec).strip()) == 0:
+            sourceSpec = None
+        elif not Rtl433Source.isValidSpec(sourceSpec):
+            LOGGER.error('Invalid rtl433_source: {}'.format(sourceSpec))
+            self.Notices['rtl433_source'] = 'rtl433_source must be udp:[host:]port, stdin or file:path.'
+            sourceSpec = None
+        if self.localSource is not None and self.localSource.spec == sourceSpec:
+            return
+        if self.localSource is not None:
+            self.localSource.stop()
+            self.localSource = None
+        if sourceSpec is not None:
+            self.localSource = Rtl433Source(sourceSpec, self.processLocalDevice)
+            self.localSource.start()
+
+    def configurePublisher(self):
+        publishTarget = self.Parameters['publish_target']
+        if publishTarget is None or len(str(publishTarget).strip()) == 0:
+            publishTarget = None
+        elif not ReadingPublisher.isAvailable(publishTarget):
+            LOGGER.error('publish_target {} requires paho-mqtt'.format(publishTarget))
+            self.Notices['publish_target'] = 'Install paho-mqtt to publish to an MQTT broker.'
+            publishTarget = None
+        publishFormat = self.Parameters['publish_format']
+        publishFormat = 'json' if publishFormat is None or len(publishFormat) == 0 else str(publishFormat).lower()
+        if publishFormat not in FORMATS:
+            LOGGER.error('Invalid publish_format: {}, using json'.format(publishFormat))
+            publishFormat = 'json'
+
+        if self.publisher is not None:
+            if self.publisher.target == publishTarget:
+                self.publisher.messageFormat = publishFormat
+                return
+            self.publisher.stop()
+            self.publisher = None
+        if publishTarget is not None:
+            try:
+                self.publisher = ReadingPublisher(publishTarget, publishFormat)
+                LOGGER.info('Publishing readings to {} as {}'.format(publishTarget, publishFormat))
+            except Exception as ex:
+                LOGGER.error('Unable to publish to {}: {}'.format(publishTarget, ex))
+                self.Notices['publish_target'] = 'Unable to publish to {}: {}'.format(publishTarget, ex)
+
+    def parseFixtureParam(self):
+        replayDir = self.Parameters['replay_dir']
+        if replayDir is not None and len(replayDir) > 0:
+            LOGGER.info('Replaying recorded Acurite responses from {}'.format(replayDir))
+            return 'replay', replayDir
+        recordDir = self.Parameters['record_dir']
+        if recordDir is not None and len(recordDir) > 0:
+            LOGGER.info('Recording Acurite responses to {}'.format(recordDir))
+            return 'record', recordDir
+        return None
+
+    def parseAsyncEngineParam(self):
+        pollEngine = self.Parameters['poll_engine']
+        if pollEngine is None or str(pollEngine).strip().lower() != 'async':
+            return False
+        if not AsyncAcuriteManager.isAvailable():
+            LOGGER.error('poll_engine async requires aiohttp, falling back to sync')
+            self.Notices['poll_engine'] = 'Install aiohttp to use the async poll engine.'
+            return False
+        if self.asyncEngine is None:
+            self.asyncEngine = AsyncPollEngine(self.resultQueue)
+            threading.Thread(target=self.processAsyncResults, name='acurite-results', daemon=True).start()
+        return True
+
+    def parsePollOverrunParam(self):
+        pollOverrun = self.Parameters['poll_overrun']
+        if pollOverrun is None or len(pollOverrun) == 0:
+            return COALESCE
+        pollOverrun = str(pollOverrun).strip().lower()
+        if pollOverrun not in POLICIES:
+            LOGGER.error('Invalid poll_overrun: {}, using {}'.format(pollOverrun, COALESCE))
+            return COALESCE
+        return pollOverrun
+
+    def parseBoolParam(self, name, default):
+        value = self.Parameters[name]
+        if value is None or len(str(value)) == 0:
+            return default
+        return str(value).strip().lower() in ('true', 'yes', 'on', '1')
+
+    def parseNumberParam(self, name, default, cast):
+        value = self.Parameters[name]
+        if value is None or len(str(value)) == 0:
+            return default
+        try:
+            return cast(value)
+        except ValueError:
+            LOGGER.error('Invalid value for {}: {}, using {}'.format(name, value, default))
+            return default
+
     def poll(self, pollType):
         if 'shortPoll' in pollType:
             LOGGER.info('shortPoll (controller)')
-            self.query()
+            if self.adaptivePoll and not self.pollScheduler.isDue():
+                LOGGER.debug('No new Acurite data expected yet, skipping fetch')
+                return
+            self.fetchDevices('shortPoll')
         else:
             LOGGER.info('longPoll (controller)')
-            pass
+            self.driverReporter.logSummary()
+            # Force every driver out again on the next update so the ISY can't drift from suppressed reports
+            self.driverReporter.refresh()
+            self.forceUpdate = True
+            self.discoveryPending = True
+            if self.historyStore is not None:
+                self.historyStore.compact()
+            METRICS.logSummary()
 
     def query(self, command=None):
-        self.discover()
+        self.fetchDevices('Query')
         LOGGER.info('AcuriteController - query')
 
     def discover(self, *args, **kwargs):
-        acuriteUser = self.Parameters['acurite_user']
-        acuritePassword = self.Parameters['acurite_password']
-        try:
-            LOGGER.info("Starting Acurite Device Discovery")
-            LOGGER.info('acurite_user: {}'.format(self.Parameters['acurite_user']))
+        self.discoveryPending = True
+        self.fetchDevices('Discover')
+
+    def fetchDevices(self, caller='Fetch'):
+        if not self.accountPool.isConfigured():
+            if self.localSource is None:
+                LOGGER.error('Acurite credentials are not configured, skipping fetch')
+            return
+        # shortPoll, QUERY, DISCOVER and parameter changes all land here; only one of them fetches at a time
+        # and poll_overrun decides what the others do
+        flight = self.fetchFlight.begin(caller, wait=not self.accountPool.useAsync)
+        if flight is None:
+            return
+        while True:
+            if self.runFetch(flight):
+                # Handed to the async engine, the flight lands in processAsyncResults
+                return
+            if not self.fetchFlight.end(flight):
+                return
 
-            acuriteManager = AcuriteManager(acuriteUser, acuritePassword)
-            deviceRespJO = acuriteManager.getHubDevices()
+    def runFetch(self, flight):
+        """Makes one fetch for flight; returns True when it went to the async engine and its result arrives later."""
+        try:
+            LOGGER.info("Fetching Acurite Devices")
+
+            if not self.circuitBreaker.allow():
+                LOGGER.info('Acurite API is unavailable, serving cached values')
+                self.serveStale(self.cloudAddresses())
+                return False
+            self.reportCircuitState()
+            if self.accountPool.useAsync:
+                self.asyncEngine.submit(lambda: self.fetchAsync(flight))
+                return True
+            with METRICS.timer('acurite_discover_seconds'):
+                self.processDevices(self.accountPool.getDevices())
+        except Exception as ex:
+            LOGGER.error("AcuriteController - Fetch failed with error: {}".format(ex))
+            self.fetchFailed()
+        return False
 
+    async def fetchAsync(self, flight):
+        """Tags the async poll with its flight, so a result that arrives after the flight timed out can't land
+        the one that replaced it."""
+        try:
+            deviceRespJO = await self.accountPool.getDevicesAsync()
+        except Exception as ex:
+            LOGGER.error('AcuriteController - Async fetch failed with error: {}'.format(ex))
+            deviceRespJO = None
+        return flight, deviceRespJO
+
+    def fetchFailed(self):
+        self.pollScheduler.fetchFailed()
+        self.circuitBreaker.recordFailure()
+        self.reportCircuitState()
+        self.serveStale(self.cloudAddresses())
+
+    def cloudAddresses(self):
+        return self.nodeIndex.keys() - self.localAddresses
+
+    def serveStale(self, addresses):
+        """Re-serves the cached payload for addresses, which only ages GV3 and raises the stale flag."""
+        with self.driverReporter.batch():
+            for address in list(addresses):
+                deviceNode = self.nodeIndex.get(address)
+                device = self.snapshotStore.get(address)
+                if deviceNode is None or device is None:
+                    continue
+                try:
+                    deviceNode.serveCached(device)
+                except Exception as ex:
+                    LOGGER.error('Failed to serve cached values for {}: {}'.format(address, ex))
+
+    def reportCircuitState(self):
+        self.setDriver('GV0', self.circuitBreaker.state)
+
+    def processAsyncResults(self):
+        while True:
+            result = self.resultQueue.get()
+            if result is STOP_PROCESSING:
+                break
+            flight, deviceRespJO = result
+            self.processDevices(deviceRespJO)
+            # Run the fetch an overrun queued behind this one, if any
+            while self.fetchFlight.end(flight):
+                if self.runFetch(flight):
+                    break
+
+    def refreshHub(self, hubKey):
+        """Fetches one hub and applies it like a poll limited to that hub's devices."""
+        accountNumber, hubId = hubKey
+        if self.accountPool.useAsync:
+            # Async managers guard their token with an asyncio lock, so the refresh has to run on the engine loop
+            deviceRespJO = self.asyncEngine.call(lambda: self.accountPool.getHubDevicesAsync(accountNumber, hubId))
+        else:
+            deviceRespJO = self.accountPool.getHubDevices(accountNumber, hubId)
+        if deviceRespJO is None:
+            LOGGER.error('Failed to refresh hub {}'.format(hubId))
+            return
+        self.processDevices(deviceRespJO)
+
+    def requestHubRefresh(self, address):
+        """Node QUERY hook: re-fetches the node's hub in the background, at most once per query_refresh_interval."""
+        if not self.queryRefresh or self.circuitBreaker.state != CLOSED:
+            return
+        device = self.snapshotStore.get(address)
+        if device is None or device.get('hub_id') in (None, LOCAL_HUB_ID):
+            return
+        hubKey = (device.get('account'), device.get('hub_id'))
+        now = time.monotonic()
+        with self.refreshLock:
+            lastRefresh = self.hubRefreshTimes.get(hubKey)
+            if lastRefresh is not None and now - lastRefresh < self.queryRefreshInterval:
+                debug('Hub {} was refreshed {:.0f}s ago, not refreshing for {}', hubKey[1], now - lastRefresh, address)
+                METRICS.increment('acurite_query_refreshes', {'result': 'limited'})
+                return
+            self.hubRefreshTimes[hubKey] = now
+        METRICS.increment('acurite_query_refreshes', {'result': 'started'})
+        threading.Thread(target=self.refreshHub, args=(hubKey,), name='acurite-refresh', daemon=True).start()
+
+    def stormChanged(self, active):
+        self.setDriver('GV1', 1 if active else 0)
+
+    def processDevices(self, deviceRespJO):
+        with METRICS.timer('acurite_process_seconds'), self.applyLock:
+            self.applyDevices(deviceRespJO)
+
+    def processLocalDevice(self, device):
+        """Applies one rtl_433 device update the moment it is received, without touching the cloud poll state."""
+        with METRICS.timer('acurite_process_seconds', {'source': 'rtl433'}), self.applyLock:
+            address = device['address']
+            self.localAddresses.add(address)
+            if self.historyStore is not None:
+                self.historyStore.record([device])
+            # Saved with the next cloud poll or at stop, radio devices report far too often to write every time
+            self.snapshotStore.update([device])
+            if address not in self.nodeIndex:
+                self.syncNodes([device], True)
+            deviceNode = self.nodeIndex.get(address)
+            if deviceNode is not None:
+                self.updateNode(deviceNode, device)
+            self.stormMonitor.observe([device], pushed=True)
+            self.markPopulated('rtl433')
+            self.publish([device])
+
+    def publish(self, devices):
+        if self.publisher is None:
+            return
+        for device in devices:
+            self.publisher.offer(device)
+
+    def applyDevices(self, deviceRespJO):
+        try:
             if deviceRespJO is None:
                 LOGGER.error('No Response Returned from Acurite')
+                self.fetchFailed()
                 return
+            devices = [device for device in deviceRespJO['devices'] if device is not None]
+            # A single hub refresh says nothing about the other hubs, so it skips cadence learning,
+            # stale marking and discovery
+            hubRefresh = 'hub' in deviceRespJO
+            self.circuitBreaker.recordSuccess()
+            self.reportCircuitState()
+            if not hubRefresh:
+                self.pollScheduler.record(devices)
+            if self.snapshotStore.update(devices):
+                self.snapshotStore.save()
+            if self.historyStore is not None:
+                self.historyStore.record(devices)
+            forceUpdate = self.forceUpdate
+            # A storm refresh landing after a long poll must leave the full refresh to the next complete poll
+            if not hubRefresh:
+                self.forceUpdate = False
+
+            dumpPayloads = self.payloadSampler.nextPoll()
+            # Hot path: index lookups and updates only, existing nodes never wait behind node creation.
+            # Every node's driver changes go out together when the batch closes, so the ISY never
+            # sees a half-updated poll.
+            with self.driverReporter.batch():
+                for device in devices:
+                    if dumpPayloads and self.payloadSampler.shouldDump(device):
+                        LOGGER.debug('Device JSON: %s', LazyJson(device))
+                    deviceNode = self.nodeIndex.get(device['address'])
+                    if deviceNode is None:
+                        continue
+                    if device.get('unchanged', False) and not forceUpdate:
+                        # Same payload as last poll, only the locally computed check-in age can have moved
+                        deviceNode.updateLastCheckIn(device)
+                    else:
+                        self.updateNode(deviceNode, device)
 
-            for device in deviceRespJO['devices']:
-                if device is not None:
-                    deviceId = device['id']
-                    deviceName = device['name']
-                    deviceModel = device['model_code']
+            self.stormMonitor.observe(devices)
+            if hubRefresh:
+                self.publish([device for device in devices if not device.get('unchanged', False)])
+                return
 
-                    LOGGER.debug('Device Id: {}'.format(deviceId))
-                    LOGGER.debug('Device Name: {}'.format(deviceName))
-                    LOGGER.debug('Device JSON: {}'.format(json.dumps(device)))
-                    LOGGER.debug('Controller Address: {}'.format(self.address))
+            # Devices behind a failed account or hub keep their cached values, flagged stale
+            self.serveStale(self.cloudAddresses() - {device['address'] for device in devices})
 
-                    deviceNode = self.poly.getNode(deviceId)
+            if self.discoveryPending:
+                self.discoveryPending = False
+                partial = len(deviceRespJO.get('failed_accounts', [])) > 0 or len(deviceRespJO.get('failed_hubs', [])) > 0
+                self.syncNodes(devices, partial)
+            self.markPopulated('live')
+            self.publish([device for device in devices if not device.get('unchanged', False)])
 
-                    if deviceNode is None:
-                        if deviceModel == 'Atlas':
-                            LOGGER.debug("Creating AcuriteAtlasNode")
-                            try:
-                                atlas_node = nodes.AcuriteAtlasNode(self.poly, self.address, deviceId, deviceName,
-                                                              device)
-                                self.poly.addNode(atlas_node)
-                            except Exception as ex:
-                                LOGGER.error("Error Loading AcuriteAtlasNode", ex)
-                                continue
-                        elif deviceModel == 'LightningT':
-                            LOGGER.debug("Creating AcuriteLightningTNode")
-                            try:
-                                lightningt_node = nodes.AcuriteLightningTNode(self.poly, self.address, deviceId, deviceName,
-                                                                    device)
-                                self.poly.addNode(lightningt_node)
-                            except Exception as ex:
-                                LOGGER.error("Error Loading AcuriteLightningTNode", ex)
-                                continue
-                        else:
-                            LOGGER.debug("Creating AcuriteDeviceNode")
-                            try:
-                                device_node = nodes.AcuriteDeviceNode(self.poly, self.address, deviceId, deviceName,
-                                                               device)
-                                self.poly.addNode(device_node)
-                            except Exception as ex:
-                                LOGGER.error("Error Loading AcuriteDeviceNode", ex)
-                                continue
-
-                            self.deviceCount += 1
-                    else:
-                        LOGGER.info('Node {} already exists, skipping'.format(deviceId))
-                        deviceNode.update(device)
-            infinitePreventor = 30
-            loopCount = 0
-            # Wait for nodes to be created
-            while self.nodesAddedCount < self.deviceCount:
-                time.sleep(2)
-                loopCount += 1
-                if infinitePreventor == loopCount:
-                    LOGGER.error("AcuriteController - Reached In Nodes Added Successful vs Nodes trying to be added. "
-                                 "Nodes Added: {} ,Num of Devices trying to be added: {}".format(self.nodesAddedCount,
-                                                                                                 self.deviceCount))
+        except Exception as ex:
+            LOGGER.error("AcuriteController - Processing devices failed with error: {}".format(ex))
+
+    def syncNodes(self, devices, partial):
+        """Full discovery: adds nodes for new devices and drops devices that disappeared from the index."""
+        LOGGER.info("Starting Acurite Device Discovery")
+        devicesByAddress = {device['address']: device for device in devices}
+        addedAddresses = devicesByAddress.keys() - self.nodeIndex.keys()
+        removedAddresses = self.nodeIndex.keys() - devicesByAddress.keys() - self.localAddresses
+
+        addedNodes = {}
+        for address in addedAddresses:
+            device = devicesByAddress[address]
+            debug('Device Id: {}', address)
+            debug('Device Name: {}', device['name'])
+            LOGGER.debug('Device JSON: %s', LazyJson(device))
+
+            deviceNode = self.poly.getNode(address)
+            if deviceNode is not None:
+                self.nodeIndex[address] = deviceNode
+                self.updateNode(deviceNode, device)
+                continue
+            deviceNode = self.createNode(device)
+            if deviceNode is not None:
+                addedNodes[self.nodeTracker.expect(deviceNode.address)] = deviceNode.address
+                self.poly.addNode(deviceNode)
+                self.nodeIndex[address] = deviceNode
+
+        # A failed account or hub can't tell us anything about its devices, so only prune on a complete response
+        if not partial:
+            for address in removedAddresses:
+                LOGGER.info('Device {} is no longer reported by Acurite'.format(address))
+                del self.nodeIndex[address]
+                self.driverReporter.forgetNode(address)
+                if self.publisher is not None:
+                    self.publisher.forgetDevice(address)
+            # Otherwise the next restart restores them from the snapshot
+            if self.snapshotStore.remove(removedAddresses):
+                self.snapshotStore.save()
+
+        if len(addedNodes) > 0:
+            pendingAddresses = self.nodeTracker.waitFor(addedNodes, NODE_ADD_TIMEOUT)
+            if len(pendingAddresses) > 0:
+                LOGGER.error("AcuriteController - Timed out waiting for nodes to be added. "
+                             "Nodes Added: {}, Nodes still pending: {}".format(
+                                 len(addedNodes) - len(pendingAddresses), pendingAddresses))
+        LOGGER.info('Discovery complete, {} added, {} removed, {} nodes'.format(
+            len(addedNodes), len(removedAddresses) if not partial else 0, len(self.nodeIndex)))
+
+    def updateNode(self, deviceNode, device):
+        try:
+            with METRICS.timer('acurite_node_update_seconds', {'model': device.get('model_code')}):
+                deviceNode.update(device)
+        except Exception as ex:
+            METRICS.increment('acurite_parse_errors', {'stage': 'node'})
+            LOGGER.error('Failed to update node {}: {}'.format(deviceNode.address, ex))
 
+    def createNode(self, device):
+        deviceId = device['address']
+        deviceName = device['name']
+        debug("Creating AcuriteNode for model {}", device['model_code'])
+        try:
+            return nodes.AcuriteNode(self.poly, self.address, deviceId, deviceName, device, self.driverReporter,
+                                     self.requestHubRefresh)
         except Exception as ex:
-            LOGGER.error("AcuriteController - Discovery failed with error", ex)
+            LOGGER.error("Error Loading AcuriteNode: {}".format(ex))
+        return None
 
     def delete(self):
         LOGGER.info('Deleting Acurite Node Server')
 
     def stop(self):
         LOGGER.info('Stopping Acurite NodeServer.')
+        self.accountPool.close()
+        if self.localSource is not None:
+            self.localSource.stop()
+        if self.publisher is not None:
+            self.publisher.stop()
+        self.stormMonitor.stop()
+        self.snapshotStore.save()
+        METRICS.stopServer()
+        if self.asyncEngine is not None:
+            self.resultQueue.put(STOP_PROCESSING)
+            self.asyncEngine.stop()
 
     def remove_notices_all(self, command):
         self.Notices.clear()
 
     id = 'acurite'
     commands = {'QUERY': query, 'REMOVE_NOTICES_ALL': remove_notices_all, 'DISCOVER': discover}
-    drivers = [{'driver': 'ST', 'value': 1, 'uom': 2}]
+    drivers = [{'driver': 'ST', 'value': 1, 'uom': 2},
+               {'driver': 'GV0', 'value': 0, 'uom': 25},
+               {'driver': 'GV1', 'value': 0, 'uom': 2}]
@@ -0,0 +1,90 @@
+# Model registry: each AcuRite model_code maps to the nodedef it is shown as in the ISY and the
+# table the generic AcuriteNode runs against the device payload.
+#
+#   nodeDef      - nodedef id in profile/nodedef/nodedefs.xml
+#   sensors      - (driver, sensor_code) pairs copied straight from the payload
+#   fallbacks    - (driver, [sensor_code, ...]) the first sensor reading above zero wins, otherwise 0
+#   gated        - (gate sensor_code, [(driver, sensor_code), ...]) drivers only reported while the gate
+#                  sensor reads above zero, otherwise reset to 0
+#   derived      - publish the rolling rain/pressure/gust drivers from DerivedMetrics
+#   drivers      - udi_interface driver list
+
+COMMON_SENSORS = [('CLITEMP', 'Temperature'),
+                  ('CLIHUM', 'Humidity'),
+                  ('DEWPT', 'Dew Point'),
+                  ('BARPRES', 'Barometric Pressure')]
+
+FEELS_LIKE = ('GV4', ['Feels Like', 'Heat Index'])
+
+LIGHTNING = ('LightningStrikeCnt', [('GV5', 'LightningStrikeCnt'),
+                                    ('GV6', 'LightningLastStrikeDist'),
+                                    ('GV8', 'LightningClosestStrikeDist')])
+
+STATUS_DRIVERS = [{'driver': 'GV1', 'value': 0, 'uom': '25'},  # device battery
+                  {'driver': 'GV2', 'value': 0, 'uom': '25'},  # device status
+                  {'driver': 'GV3', 'value': 0, 'uom': '45'},  # last checkin time
+                  {'driver': 'GV13', 'value': 0, 'uom': '2'}]  # values served from the cache
+
+DEFAULT_MODEL = {
+    'nodeDef': 'acuritedevice',
+    'sensors': COMMON_SENSORS,
+    'fallbacks': [],
+    'gated': [],
+    'derived': False,
+    'drivers': [{'driver': 'CLITEMP', 'value': 0, 'uom': '17'},
+                {'driver': 'CLIHUM', 'value': 0, 'uom': '22'},
+                {'driver': 'BARPRES', 'value': 0, 'uom': '23'},
+                {'driver': 'DEWPT', 'value': 0, 'uom': '17'}] + STATUS_DRIVERS
+}
+
+MODELS = {
+    'Atlas': {
+        'nodeDef': 'acuriteatlas',
+        'sensors': COMMON_SENSORS + [('WINDDIR', 'Wind Direction'),
+                                     ('SPEED', 'Wind Speed'),
+                                     ('RAINRT', 'Rainfall'),
+                                     ('LUMIN', 'LightIntensity'),
+                                     ('UV', 'UVIndex'),
+                                     ('GV7', 'WindSpeedAvg')],
+        'fallbacks': [FEELS_LIKE],
+        'gated': [LIGHTNING],
+        'derived': True,
+        'drivers': [{'driver': 'CLITEMP', 'value': 0, 'uom': '17'},
+                    {'driver': 'GV4', 'value': 0, 'uom': '17'},
+                    {'driver': 'CLIHUM', 'value': 0, 'uom': '22'},
+                    {'driver': 'BARPRES', 'value': 0, 'uom': '23'},
+                    {'driver': 'DEWPT', 'value': 0, 'uom': '17'}] + STATUS_DRIVERS +
+                   [{'driver': 'WINDDIR', 'value': 0, 'uom': '14'},
+                    {'driver': 'SPEED', 'value': 0, 'uom': '48'},
+                    {'driver': 'RAINRT', 'value': 0, 'uom': '120'},
+                    {'driver': 'LUMIN', 'value': 0, 'uom': '36'},
+                    {'driver': 'UV', 'value': 0, 'uom': '71'},
+                    {'driver': 'GV5', 'value': 0, 'uom': '56'},
+                    {'driver': 'GV6', 'value': 0, 'uom': '116'},
+                    {'driver': 'GV8', 'value': 0, 'uom': '116'},
+                    {'driver': 'GV7', 'value': 0, 'uom': '48'},
+                    {'driver': 'GV9', 'value': 0, 'uom': '105'},
+                    {'driver': 'GV10', 'value': 0, 'uom': '105'},
+                    {'driver': 'GV11', 'value': 0, 'uom': '23'},
+                    {'driver': 'GV12', 'value': 0, 'uom': '48'}]
+    },
+    'LightningT': {
+        'nodeDef': 'acuritelightningt',
+        'sensors': COMMON_SENSORS,
+        'fallbacks': [FEELS_LIKE],
+        'gated': [LIGHTNING],
+        'derived': False,
+        'drivers': [{'driver': 'CLITEMP', 'value': 0, 'uom': '17'},
+                    {'driver': 'GV4', 'value': 0, 'uom': '17'},  # Heat Index / Feels Like
+                    {'driver': 'CLIHUM', 'value': 0, 'uom': '22'},
+                    {'driver': 'BARPRES', 'value': 0, 'uom': '23'},
+                    {'driver': 'DEWPT', 'value': 0, 'uom': '17'}] + STATUS_DRIVERS +
+                   [{'driver': 'GV5', 'value': 0, 'uom': '0'},  # lightning Strike Cnt
+                    {'driver': 'GV6', 'value': 0, 'uom': '116'},  # lightning Last Strike Dist
+                    {'driver': 'GV8', 'value': 0, 'uom': '116'}]  # lightning Closest Strike Dist
+    },
+}
+
+
+def getModel(modelCode):
+    return MODELS.get(modelCode, DEFAULT_MODEL)
@@ -0,0 +1,127 @@
+from datetime import datetime, timezone
+
+import udi_interface
+from enums import DeviceStatus, BatteryLevel
+from acurite.SensorIndex import SensorIndex
+from acurite.DriverReporter import DriverReporter
+from acurite.DerivedMetrics import DerivedMetrics
+from acurite.LogUtil import debug
+from .AcuriteModels import getModel
+
+LOGGER = udi_interface.LOGGER
+Custom = udi_interface.Custom
+
+
+class AcuriteNode(udi_interface.Node):
+    def __init__(self, polyglot, primary, address, name, device, reporter=None, onQuery=None):
+        # The nodedef and driver list come from the model registry, so they must be in place before
+        # udi_interface copies the drivers in Node.__init__
+        self.model = getModel(device.get('model_code'))
+        self.id = self.model['nodeDef']
+        self.drivers = self.model['drivers']
+        super(AcuriteNode, self).__init__(polyglot, primary, address, name)
+        debug("Initialize AcuriteNode ({})", self.id)
+        self.poly.subscribe(self.poly.START, self.start, address)
+        self.initDevice = device
+        self.reporter = reporter if reporter is not None else DriverReporter()
+        self.derivedMetrics = DerivedMetrics() if self.model['derived'] else None
+        self.onQuery = onQuery
+        self.lastDevice = None
+        self.stale = False
+
+    def start(self):
+        LOGGER.debug("AcuriteNode - start")
+        self.update(self.initDevice)
+
+    def query(self, command=None):
+        """Answers straight from the last payload, with GV3 aged to now, then asks for an optional hub refresh."""
+        LOGGER.info('AcuriteNode - query')
+        with self.transaction():
+            if self.lastDevice is not None:
+                self.updateLastCheckIn(self.lastDevice, self.stale)
+            self.reporter.reportAll(self)
+        if self.onQuery is not None:
+            self.onQuery(self.address)
+
+    def convert_timedelta_min(self, duration):
+        days, seconds = duration.days, duration.seconds
+        hours = seconds // 3600
+        minutes = (seconds % 3600) // 60
+        # seconds = (seconds % 60)
+        return (days * 24 * 60) + (hours * 60) + minutes
+
+    def transaction(self):
+        return self.reporter.batch()
+
+    def update(self, device):
+        with self.transaction():
+            self.updateDrivers(device)
+
+    def updateDrivers(self, device):
+        LOGGER.debug("AcuriteNode - update")
+        deviceName = device['name']
+        deviceBattery = device['battery_level']
+        deviceStatus = device['status_code']
+        self.reporter.report(self, 'GV1', BatteryLevel[deviceBattery].value)
+        self.reporter.report(self, 'GV2', DeviceStatus[deviceStatus].value)
+
+        sensorIndex = SensorIndex(device)
+        for driver, sensorCode, value, unit in sensorIndex.extract(self.model['sensors']):
+            self.reporter.report(self, driver, value)
+            debug('Device Name: {}, Sensor {}: {} {}', deviceName, sensorCode, value, unit)
+
+        for driver, sensorCodes in self.model['fallbacks']:
+            sensorCode, value = sensorIndex.firstPositive(sensorCodes)
+            self.reporter.report(self, driver, value)
+            if sensorCode is not None:
+                debug('Device Name: {}, Sensor {}: {} {}', deviceName, sensorCode, value, sensorIndex.unit(sensorCode))
+
+        for gateSensorCode, sensorDrivers in self.model['gated']:
+            if sensorIndex.firstPositive((gateSensorCode,))[0] is not None:
+                for driver, sensorCode, value, unit in sensorIndex.extract(sensorDrivers):
+                    self.reporter.report(self, driver, value)
+                    debug('Device Name: {}, Sensor {}: {} {}', deviceName, sensorCode, value, unit)
+            else:
+                for driver, sensorCode in sensorDrivers:
+                    self.reporter.report(self, driver, 0)
+
+        if self.derivedMetrics is not None:
+            self.updateDerivedMetrics(device, sensorIndex)
+        # Payloads restored from the snapshot at startup are shown as cached until the first live fetch
+        self.updateLastCheckIn(device, device.get('cached', False))
+
+    def updateDerivedMetrics(self, device, sensorIndex):
+        try:
+            deviceLastCheckIn = device['last_check_in_at']
+            if deviceLastCheckIn is not None and deviceLastCheckIn != '':
+                checkInTimestamp = datetime.fromisoformat(deviceLastCheckIn).timestamp()
+                self.derivedMetrics.update(checkInTimestamp, sensorIndex)
+            for driver, value in self.derivedMetrics.drivers():
+                self.reporter.report(self, driver, value)
+        except Exception as ex:
+            LOGGER.error('AcuriteNode - Error in derived metrics: {}'.format(ex))
+
+    def serveCached(self, device):
+        """Keeps the last good values but ages GV3 from the cached check-in and flags the node stale."""
+        self.updateLastCheckIn(device, stale=True)
+
+    def updateLastCheckIn(self, device, stale=False):
+        self.lastDevice = device
+        self.stale = stale
+        self.reporter.report(self, 'GV13', 1 if stale else 0)
+        deviceLastCheckIn = device['last_check_in_at']
+        try:
+            if deviceLastCheckIn is not None and deviceLastCheckIn != '':
+                lastCheckInDateTime = datetime.fromisoformat(deviceLastCheckIn)
+                currentDateTimeInUtc = datetime.now(timezone.utc)
+                deltaDateTime = currentDateTimeInUtc - lastCheckInDateTime
+                numOfMins = self.convert_timedelta_min(deltaDateTime)
+                self.reporter.report(self, 'GV3', numOfMins)
+            else:
+                self.reporter.report(self, 'GV3', 0)
+        except Exception as ex:
+            LOGGER.error('AcuriteNode - Error in update: {}'.format(ex))
+
+    id = 'acuritedevice'
+    commands = {'QUERY': query}
+    drivers = []
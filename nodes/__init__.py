@@ -1,4 +1,2 @@
-from .AcuriteDeviceNode import AcuriteDeviceNode
+from .AcuriteNode import AcuriteNode
 from .AcuriteController import AcuriteController
-from .AcuriteAtlasNode import AcuriteAtlasNode
-from .AcuriteLightningTNode import AcuriteLightningTNode
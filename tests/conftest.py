@@ -0,0 +1,117 @@
+"""Shared fixtures. udi_interface only exists inside Polyglot, so a minimal stand-in is installed before any
+node server module is imported."""
+import copy
+import logging
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class Custom(dict):
+    def __init__(self, polyglot, name):
+        super(Custom, self).__init__()
+        self.name = name
+
+    def load(self, data):
+        self.update(data)
+
+    def __getitem__(self, key):
+        return self.get(key)
+
+
+class Node():
+    def __init__(self, polyglot, primary, address, name):
+        self.poly = polyglot
+        self.primary = primary
+        self.address = address
+        self.name = name
+        self.drivers = copy.deepcopy(self.drivers)
+        self.reported = []
+        self.forced = []
+
+    def setDriver(self, driver, value, report=True, force=False, uom=None, text=None):
+        for entry in self.drivers:
+            if entry['driver'] == driver:
+                entry['value'] = value
+        if report:
+            self.reported.append((driver, value))
+        if force:
+            self.forced.append(driver)
+
+    def getDriver(self, driver):
+        for entry in self.drivers:
+            if entry['driver'] == driver:
+                return entry['value']
+        return None
+
+    def reportDrivers(self):
+        self.reported.extend((entry['driver'], entry['value']) for entry in self.drivers)
+
+
+class FakePolyglot():
+    """Records nodes and status messages; ADDNODEDONE is delivered synchronously from addNode()."""
+
+    CUSTOMPARAMS = 'customparams'
+    CUSTOMDATA = 'customdata'
+    START = 'start'
+    POLL = 'poll'
+    ADDNODEDONE = 'addnodedone'
+    STOP = 'stop'
+
+    def __init__(self):
+        self.nodes = {}
+        self.subscriptions = []
+        self.messages = []
+        self.profileUpdates = 0
+
+    def subscribe(self, event, callback, address=None):
+        self.subscriptions.append((event, callback, address))
+
+    def ready(self):
+        pass
+
+    def addNode(self, node, *args, **kwargs):
+        self.nodes[node.address] = node
+        for event, callback, address in self.subscriptions:
+            if event == self.ADDNODEDONE:
+                callback({'address': node.address})
+        return node
+
+    def getNode(self, address):
+        return self.nodes.get(address)
+
+    def send(self, message, messageType):
+        self.messages.append((messageType, message))
+
+    def updateProfile(self):
+        self.profileUpdates += 1
+
+    def setCustomParamsDoc(self):
+        pass
+
+
+udiInterface = types.ModuleType('udi_interface')
+udiInterface.LOGGER = logging.getLogger('udi_interface')
+udiInterface.LOG_HANDLER = None
+udiInterface.Custom = Custom
+udiInterface.Node = Node
+sys.modules['udi_interface'] = udiInterface
+
+
+@pytest.fixture
+def poly():
+    return FakePolyglot()
+
+
+@pytest.fixture
+def controller(poly, tmp_path, monkeypatch):
+    """A controller working in tmp_path, so its snapshot and history files stay out of the tree."""
+    from nodes.AcuriteController import AcuriteController
+    monkeypatch.chdir(tmp_path)
+    controller = AcuriteController(poly, 'controller', 'controller', 'AcuRite')
+    yield controller
+    controller.stop()
@@ -0,0 +1,100 @@
+"""Local stand-in for marapi.myacurite.com that serves a replay fixture directory over real HTTP/1.1.
+
+Unlike ReplayTransport it goes through the requests session, so connection pooling, timeouts and retries are
+exercised the same way they are against the real API.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from acurite.ReplayTransport import fixtureName
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; without this Nagle holds the body for the delayed ACK
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super(StubHandler, self).setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.serve()
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        self.serve()
+
+    def serve(self):
+        stub = self.server
+        fixture = fixtureName(self.path)
+        with stub.lock:
+            stub.requests.append(self.path)
+            fail = stub.failures.get(fixture, 0) > 0
+            if fail:
+                stub.failures[fixture] -= 1
+        if stub.delay > 0:
+            time.sleep(stub.delay)
+        if fail:
+            self.respond(503, b'{}')
+            return
+        path = os.path.join(stub.fixtureDir, fixture) if fixture is not None else None
+        if path is None or not os.path.exists(path):
+            self.respond(404, b'{}')
+            return
+        with open(path) as fixtureFile:
+            recorded = json.load(fixtureFile)
+        body = json.dumps(recorded['body']).encode('utf-8')
+        etag = recorded.get('headers', {}).get('ETag') or '"{}"'.format(hashlib.sha1(body).hexdigest())
+        if self.headers.get('If-None-Match') == etag:
+            self.respond(304, b'', {'ETag': etag})
+            return
+        self.respond(recorded['status'], body, {'ETag': etag})
+
+    def respond(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubServer(ThreadingHTTPServer):
+    """Serves fixtureDir on an ephemeral localhost port; delay and failures inject latency and 503s."""
+
+    daemon_threads = True
+
+    def __init__(self, fixtureDir):
+        super(StubServer, self).__init__(('127.0.0.1', 0), StubHandler)
+        self.fixtureDir = fixtureDir
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = []
+        # fixture name -> number of 503s to return before serving it
+        self.failures = {}
+        self.delay = 0.0
+        self.thread = None
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}'.format(self.server_address[1])
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
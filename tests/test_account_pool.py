@@ -0,0 +1,51 @@
+from acurite.AccountPool import AccountPool
+from acurite.AsyncAcuriteManager import AsyncAcuriteManager
+
+
+def configure(pool, credentials, useAsync=False, fixtureMode=None):
+    pool.configure(credentials, 5.0, 15.0, 0, useAsync, fixtureMode)
+    return dict(pool.managers)
+
+
+def test_unchanged_configuration_keeps_managers():
+    pool = AccountPool()
+    try:
+        first = configure(pool, {1: ('user', 'secret'), 2: ('other', 'secret')})
+        second = configure(pool, {1: ('user', 'secret'), 2: ('other', 'secret')})
+        assert all(second[accountNumber] is first[accountNumber] for accountNumber in first)
+    finally:
+        pool.close()
+
+
+def test_changed_credentials_replace_only_that_manager():
+    pool = AccountPool()
+    try:
+        first = configure(pool, {1: ('user', 'secret'), 2: ('other', 'secret')})
+        second = configure(pool, {1: ('user', 'secret'), 2: ('other', 'changed')})
+        assert second[1] is first[1]
+        assert second[2] is not first[2]
+    finally:
+        pool.close()
+
+
+def test_async_with_fixtures_keeps_managers(tmp_path):
+    pool = AccountPool()
+    fixtureMode = ('replay', str(tmp_path))
+    try:
+        first = configure(pool, {1: ('user', 'secret')}, True, fixtureMode)
+        assert not pool.useAsync
+        assert not isinstance(first[1], AsyncAcuriteManager)
+        assert configure(pool, {1: ('user', 'secret')}, True, fixtureMode)[1] is first[1]
+    finally:
+        pool.close()
+
+
+def test_switching_engine_replaces_managers():
+    pool = AccountPool()
+    try:
+        first = configure(pool, {1: ('user', 'secret')})
+        second = configure(pool, {1: ('user', 'secret')}, True)
+        assert isinstance(second[1], AsyncAcuriteManager)
+        assert second[1] is not first[1]
+    finally:
+        pool.close()
@@ -0,0 +1,17 @@
+from acurite.DriverReporter import DriverReporter
+from acurite.ReplayTransport import syntheticDevice
+from nodes.AcuriteNode import AcuriteNode
+
+
+def test_query_reports_each_driver_once(poly):
+    device = dict(syntheticDevice(900000), address='900000')
+    node = AcuriteNode(poly, 'controller', '900000', device['name'], device, DriverReporter())
+    node.update(device)
+    poly.messages.clear()
+
+    node.query()
+    message, = [message for messageType, message in poly.messages if messageType == 'status']
+    drivers = [entry['driver'] for entry in message['set']]
+    assert sorted(drivers) == sorted(driver['driver'] for driver in node.drivers)
+    assert node.reported == []
+
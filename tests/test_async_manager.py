@@ -0,0 +1,150 @@
+import asyncio
+import json
+import queue
+
+import pytest
+
+from acurite.AccountPool import AccountPool
+from acurite.AsyncAcuriteManager import AsyncAcuriteManager
+from acurite.AsyncPollEngine import AsyncPollEngine
+
+aiohttp = pytest.importorskip('aiohttp')
+from aiohttp import web  # noqa: E402
+from aiohttp.test_utils import TestServer  # noqa: E402
+
+HUB_DEVICES = {
+    'hub1': [{'id': 1, 'name': 'Atlas', 'sensors': []}],
+    'hub2': [{'id': 2, 'name': 'Lightning', 'sensors': []}],
+}
+
+
+class StubApi():
+    """Just enough of the AcuRite API to log in, list hubs and serve hub devices with an ETag."""
+
+    def __init__(self):
+        self.logins = 0
+        self.hubRequests = []
+        self.failuresLeft = {}
+        self.rejectNextToken = False
+
+    def application(self):
+        app = web.Application()
+        app.router.add_post('/users/login', self.login)
+        app.router.add_get('/accounts/{account}/dashboard/hubs', self.hubs)
+        app.router.add_get('/accounts/{account}/dashboard/hubs/{hub}', self.hub)
+        return app
+
+    async def login(self, request):
+        self.logins += 1
+        return web.json_response({'token_id': 'token{}'.format(self.logins),
+                                  'user': {'account_users': [{'account_id': 42}]}})
+
+    def authorized(self, request):
+        if self.rejectNextToken:
+            self.rejectNextToken = False
+            return False
+        return request.headers.get('X-ONE-VUE-TOKEN') == 'token{}'.format(self.logins)
+
+    async def hubs(self, request):
+        if not self.authorized(request):
+            return web.Response(status=401)
+        return web.json_response({'account_hubs': [{'id': hubId} for hubId in HUB_DEVICES]})
+
+    async def hub(self, request):
+        hubId = request.match_info['hub']
+        self.hubRequests.append(hubId)
+        if self.failuresLeft.get(hubId, 0) > 0:
+            self.failuresLeft[hubId] -= 1
+            return web.Response(status=503)
+        if request.headers.get('If-None-Match') == hubId:
+            return web.Response(status=304)
+        return web.Response(body=json.dumps({'devices': HUB_DEVICES[hubId]}), headers={'ETag': hubId},
+                            content_type='application/json')
+
+
+def fetch(api, *rounds, configure=None):
+    """Runs getHubDevicesAsync() once per round against a stub server, calling each round before its fetch."""
+    async def run():
+        server = TestServer(api.application())
+        await server.start_server()
+        manager = AsyncAcuriteManager('user', 'secret', baseUrl=str(server.make_url('')).rstrip('/'))
+        manager.transport.backoffDelay = lambda attempt: 0
+        if configure is not None:
+            configure(manager)
+        results = []
+        try:
+            for prepare in rounds:
+                prepare()
+                results.append(await manager.getHubDevicesAsync())
+        finally:
+            await manager.session.close()
+            manager.close()
+            await server.close()
+        return results
+    return asyncio.run(run())
+
+
+def test_fetches_every_hub_from_base_url():
+    api = StubApi()
+    result, = fetch(api, lambda: None)
+    assert sorted(device['id'] for device in result['devices']) == [1, 2]
+    assert result['failed_hubs'] == []
+    assert {device['hub_id'] for device in result['devices']} == {'hub1', 'hub2'}
+    assert api.logins == 1
+
+
+def test_retries_server_errors():
+    api = StubApi()
+    api.failuresLeft['hub1'] = 2
+    result, = fetch(api, lambda: None)
+    assert len(result['devices']) == 2
+    assert api.hubRequests.count('hub1') == 3
+
+
+def test_gives_up_on_hub_after_retries():
+    api = StubApi()
+    api.failuresLeft['hub2'] = 10
+    result, = fetch(api, lambda: None, configure=lambda manager: manager.transport.configure(1.0, 1.0, 1))
+    assert [device['id'] for device in result['devices']] == [1]
+    assert result['failed_hubs'] == ['hub2']
+    assert api.hubRequests.count('hub2') == 2
+
+
+def test_logs_in_again_when_token_rejected():
+    api = StubApi()
+
+    def rejectToken():
+        api.rejectNextToken = True
+    first, second = fetch(api, lambda: None, rejectToken)
+    assert api.logins == 2
+    assert len(second['devices']) == 2
+
+
+def test_not_modified_hub_served_from_cache():
+    api = StubApi()
+    first, second = fetch(api, lambda: None, lambda: None)
+    assert [device['id'] for device in second['devices']] == [device['id'] for device in first['devices']]
+    assert all(device['unchanged'] for device in second['devices'])
+
+
+def test_hub_refresh_shares_the_async_login():
+    api = StubApi()
+    engine = AsyncPollEngine(queue.Queue())
+    server = TestServer(api.application())
+    engine.call(server.start_server)
+    pool = AccountPool(baseUrl=str(server.make_url('')).rstrip('/'))
+    pool.configure({1: ('user', 'secret')}, 5.0, 15.0, 0, True)
+    try:
+        engine.submit(pool.getDevicesAsync)
+        assert len(engine.resultQueue.get(timeout=5)['devices']) == 2
+        refreshed = engine.call(lambda: pool.getHubDevicesAsync(1, 'hub2'), 5)
+        assert refreshed['hub'] == (1, 'hub2')
+        assert [(device['address'], device['account']) for device in refreshed['devices']] == [(2, 1)]
+        # The refresh reused the token the poll logged in with
+        assert api.logins == 1
+    finally:
+        # close() hands the session close to the engine loop; let it finish before the loop stops
+        pool.close()
+        engine.call(lambda: asyncio.sleep(0.1))
+        engine.call(server.close)
+        engine.stop()
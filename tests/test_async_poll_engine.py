@@ -0,0 +1,72 @@
+import queue
+import threading
+
+import pytest
+
+from acurite.AsyncPollEngine import AsyncPollEngine
+from nodes.AcuriteController import STOP_PROCESSING
+
+
+@pytest.fixture
+def engine():
+    engine = AsyncPollEngine(queue.Queue())
+    yield engine
+    engine.stop()
+
+
+def test_submitted_results_arrive_in_order(engine):
+    async def fetch(result):
+        return result
+
+    for result in ('first', 'second'):
+        engine.submit(lambda result=result: fetch(result))
+    assert [engine.resultQueue.get(timeout=5) for _ in range(2)] == ['first', 'second']
+
+
+def test_failed_fetch_delivers_none(engine):
+    async def fetch():
+        raise IOError('connection reset')
+
+    engine.submit(fetch).result(5)
+    assert engine.resultQueue.get(timeout=5) is None
+
+
+def test_fetches_run_on_the_engine_thread(engine):
+    async def fetch():
+        return threading.current_thread().name
+
+    engine.submit(fetch)
+    assert engine.resultQueue.get(timeout=5) == 'acurite-async'
+
+
+def test_call_returns_the_result_and_raises_errors(engine):
+    async def fetch():
+        return 42
+
+    async def fail():
+        raise ValueError('bad payload')
+
+    assert engine.call(fetch, 5) == 42
+    with pytest.raises(ValueError):
+        engine.call(fail, 5)
+    assert engine.resultQueue.empty()
+
+
+def test_controller_applies_async_results_and_lands_the_flight(controller, engine, monkeypatch):
+    applied = []
+    monkeypatch.setattr(controller, 'processDevices', applied.append)
+    engine.resultQueue = controller.resultQueue
+    results = threading.Thread(target=controller.processAsyncResults)
+    results.start()
+
+    async def getDevicesAsync():
+        return {'devices': [], 'failed_accounts': [], 'failed_hubs': []}
+
+    monkeypatch.setattr(controller.accountPool, 'getDevicesAsync', getDevicesAsync)
+    flight = controller.fetchFlight.begin('shortPoll')
+    engine.submit(lambda: controller.fetchAsync(flight)).result(5)
+    controller.resultQueue.put(STOP_PROCESSING)
+    results.join(5)
+    assert not results.is_alive()
+    assert applied == [{'devices': [], 'failed_accounts': [], 'failed_hubs': []}]
+    assert not controller.fetchFlight.inFlight
@@ -0,0 +1,163 @@
+"""Poll latency, node update cost, memory per device and history ingest over synthetic fleets, plus history
+range scans and sensor lookups against the old jsonpath extraction. Run with --benchmark-only to skip the
+functional tests, or --benchmark-disable to run these once as plain tests."""
+import itertools
+import json
+import os
+import tracemalloc
+from datetime import datetime, timezone
+
+import pytest
+
+from acurite.AccountPool import AccountPool
+from acurite.AcuriteTransport import POOL_SIZE
+from acurite.DriverReporter import DriverReporter
+from acurite.HistoryStore import HistoryStore
+from acurite.ReplayTransport import syntheticDevice, writeSyntheticFleet
+from acurite.SensorIndex import SENSOR_GROUPS, SensorIndex
+from nodes.AcuriteModels import getModel
+from nodes.AcuriteNode import AcuriteNode
+from stubserver import StubServer
+
+pytest.importorskip('pytest_benchmark')
+
+FLEET_SIZES = [1, 10, 100, 500]
+DEVICES_PER_HUB = 50
+HISTORY_START = datetime(2024, 3, 1, tzinfo=timezone.utc).timestamp()
+RECORDED_HUB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'hub_recorded.json')
+
+
+@pytest.fixture(scope='module', params=FLEET_SIZES, ids=lambda size: '{}dev'.format(size))
+def fleet(request, tmp_path_factory):
+    deviceCount = request.param
+    fixtureDir = str(tmp_path_factory.mktemp('fleet{}'.format(deviceCount)))
+    writeSyntheticFleet(fixtureDir, deviceCount, max(1, deviceCount // DEVICES_PER_HUB))
+    with StubServer(fixtureDir) as server:
+        yield deviceCount, server
+
+
+def createNodes(poly, deviceCount):
+    reporter = DriverReporter()
+    nodes = []
+    for deviceIndex in range(deviceCount):
+        device = syntheticDevice(900000 + deviceIndex)
+        nodes.append((AcuriteNode(poly, 'controller', str(device['id']), device['name'], device, reporter), device))
+    return nodes
+
+
+def test_poll_latency(benchmark, fleet):
+    deviceCount, server = fleet
+    pool = AccountPool(baseUrl=server.url)
+    pool.configure({1: ('user', 'secret')}, 5.0, 15.0, 0)
+    try:
+        result = benchmark(pool.getDevices)
+    finally:
+        pool.close()
+    assert len(result['devices']) == deviceCount
+    assert result['failed_hubs'] == []
+    # Every round reuses the pooled keep-alive connections instead of opening new ones
+    assert server.connections <= POOL_SIZE
+    benchmark.extra_info['connections'] = server.connections
+
+
+@pytest.mark.parametrize('deviceCount', FLEET_SIZES)
+def test_update_cost(benchmark, poly, deviceCount):
+    nodes = createNodes(poly, deviceCount)
+
+    def updateAll():
+        for node, device in nodes:
+            node.update(device)
+    benchmark(updateAll)
+    assert all(node.lastDevice is not None for node, device in nodes)
+
+
+@pytest.mark.parametrize('deviceCount', FLEET_SIZES)
+def test_memory_per_device(benchmark, poly, deviceCount):
+    def populate():
+        nodes = createNodes(poly, deviceCount)
+        for node, device in nodes:
+            node.update(device)
+        return nodes
+
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.take_snapshot()
+        nodes = populate()
+        used = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(baseline, 'filename'))
+    finally:
+        tracemalloc.stop()
+    benchmark.extra_info['bytes_per_device'] = used // deviceCount
+    benchmark.pedantic(populate, rounds=1, iterations=1)
+    assert len(nodes) == deviceCount
+
+
+@pytest.mark.parametrize('deviceCount', FLEET_SIZES)
+def test_history_ingest(benchmark, tmp_path, deviceCount):
+    store = HistoryStore(str(tmp_path), 7)
+    devices = [dict(syntheticDevice(900000 + deviceIndex), address=str(900000 + deviceIndex))
+               for deviceIndex in range(deviceCount)]
+    minutes = itertools.count()
+
+    def ingest():
+        checkIn = datetime.fromtimestamp(HISTORY_START + next(minutes) * 60, timezone.utc).isoformat()
+        for device in devices:
+            device['last_check_in_at'] = checkIn
+        store.record(devices)
+    benchmark(ingest)
+    assert len(store.query(devices[-1]['address'], 'Temperature', HISTORY_START, HISTORY_START + 24 * 60 * 60)) > 0
+
+
+def test_history_range_scan(benchmark, tmp_path):
+    store = HistoryStore(str(tmp_path), 7)
+    # Three days of one-minute readings, the first two compacted, queried across a midnight
+    for minute in range(3 * 24 * 60):
+        store.append('d1', HISTORY_START + minute * 60, {'Temperature': float(minute)})
+    store.compact(HISTORY_START + 2 * 24 * 60 * 60)
+    start = HISTORY_START + 21 * 60 * 60
+    readings = benchmark(store.query, 'd1', 'Temperature', start, start + 6 * 60 * 60)
+    assert len(readings) == 6 * 60
+
+
+def recordedDevices():
+    with open(RECORDED_HUB) as fixtureFile:
+        return json.load(fixtureFile)['body']['devices']
+
+
+def sensorTable(device):
+    model = getModel(device['model_code'])
+    return model['sensors'] + [sensor for gate, sensors in model['gated'] for sensor in sensors]
+
+
+def jsonpathLookup(parse, devices):
+    # What every node update did before SensorIndex: parse a value and a unit query per sensor, then find
+    results = []
+    for device in devices:
+        for driver, sensorCode in sensorTable(device):
+            for group in SENSOR_GROUPS:
+                values = parse("$.{}[?sensor_code='{}'].last_reading_value".format(group, sensorCode)).find(device)
+                units = parse("$.{}[?sensor_code='{}'].chart_unit".format(group, sensorCode)).find(device)
+                if len(values) > 0:
+                    results.append((driver, sensorCode, values[0].value, units[0].value))
+                    break
+    return results
+
+
+def indexLookup(devices):
+    results = []
+    for device in devices:
+        results.extend(SensorIndex(device).extract(sensorTable(device)))
+    return results
+
+
+@pytest.mark.benchmark(group='sensor-lookup')
+def test_sensor_lookup_jsonpath(benchmark):
+    parse = pytest.importorskip('jsonpath_ng.ext').parse
+    devices = recordedDevices()
+    assert benchmark(jsonpathLookup, parse, devices) == indexLookup(devices)
+
+
+@pytest.mark.benchmark(group='sensor-lookup')
+def test_sensor_lookup_index(benchmark):
+    devices = recordedDevices()
+    results = benchmark(indexLookup, devices)
+    assert ('GV5', 'LightningStrikeCnt', 14, 'strikes') in results
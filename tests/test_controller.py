@@ -0,0 +1,33 @@
+import logging
+
+from acurite.ReplayTransport import syntheticDevice
+
+
+def test_fetch_does_not_log_the_account_email(controller, caplog):
+    controller.Parameters['acurite_user'] = 'someone@example.com'
+    with caplog.at_level(logging.DEBUG):
+        controller.runFetch(controller.fetchFlight.begin('Query'))
+    assert 'Fetching Acurite Devices' in caplog.text
+    assert 'someone@example.com' not in caplog.text
+
+
+def fleet(count):
+    return [dict(syntheticDevice(900000 + index), address=str(900000 + index), hub_id='hub1', account=1)
+            for index in range(count)]
+
+
+def test_hub_refresh_leaves_forced_update_for_the_full_poll(controller, monkeypatch):
+    devices = fleet(2)
+    controller.applyDevices({'devices': devices})
+    assert sorted(controller.nodeIndex) == ['900000', '900001']
+
+    updated = []
+    monkeypatch.setattr(controller, 'updateNode', lambda deviceNode, device: updated.append(device['address']))
+    controller.forceUpdate = True
+    controller.applyDevices({'devices': [dict(devices[0], unchanged=True)], 'hub': (1, 'hub1')})
+    assert controller.forceUpdate
+
+    # The long poll's full refresh still rewrites every node, unchanged payload or not
+    controller.applyDevices({'devices': [dict(device, unchanged=True) for device in devices]})
+    assert not controller.forceUpdate
+    assert updated == ['900000', '900000', '900001']
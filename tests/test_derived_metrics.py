@@ -0,0 +1,77 @@
+from acurite.DerivedMetrics import GUST_WINDOW, HOUR, DerivedMetrics
+from acurite.SensorIndex import SensorIndex
+
+MINUTE = 60
+
+
+def readings(rainfall=None, pressure=None, windSpeed=None):
+    sensors = []
+    for sensorCode, value in (('Rainfall', rainfall), ('Barometric Pressure', pressure), ('Wind Speed', windSpeed)):
+        if value is not None:
+            sensors.append({'sensor_code': sensorCode, 'last_reading_value': value})
+    return SensorIndex({'sensors': sensors})
+
+
+def feed(metrics, sequence):
+    for timestamp, sensorIndex in sequence:
+        metrics.update(timestamp, sensorIndex)
+    return dict(metrics.drivers())
+
+
+def test_rain_increments_across_midnight_reset():
+    metrics = DerivedMetrics()
+    drivers = feed(metrics, [(0, readings(rainfall=0.50)),
+                             (10 * MINUTE, readings(rainfall=0.60)),
+                             # Midnight: the daily total starts again from zero
+                             (20 * MINUTE, readings(rainfall=0.05)),
+                             (30 * MINUTE, readings(rainfall=0.15))])
+    # The first reading is only a baseline; after it 0.10 + 0.05 + 0.10 fell
+    assert drivers['GV9'] == 0.25
+    assert drivers['GV10'] == 0.25
+
+
+def test_rain_expires_from_1h_and_24h_windows():
+    metrics = DerivedMetrics()
+    feed(metrics, [(0, readings(rainfall=0.0)), (MINUTE, readings(rainfall=0.20))])
+    drivers = feed(metrics, [(MINUTE + HOUR, readings(rainfall=0.30))])
+    assert drivers['GV9'] == 0.10
+    assert drivers['GV10'] == 0.30
+    drivers = feed(metrics, [(MINUTE + 24 * HOUR, readings(rainfall=0.30))])
+    assert drivers['GV9'] == 0.0
+    assert drivers['GV10'] == 0.10
+    drivers = feed(metrics, [(MINUTE + 25 * HOUR, readings(rainfall=0.30))])
+    assert drivers['GV10'] == 0.0
+
+
+def test_pressure_delta_over_3h():
+    metrics = DerivedMetrics()
+    drivers = feed(metrics, [(hour * HOUR, readings(pressure=30.00 - 0.02 * hour)) for hour in range(4)])
+    assert drivers['GV11'] == -0.06
+    # The reading from hour 0 is now older than 3h, so the tendency is measured from hour 1
+    drivers = feed(metrics, [(4 * HOUR, readings(pressure=29.90))])
+    assert drivers['GV11'] == -0.08
+
+
+def test_single_pressure_reading_has_no_tendency():
+    metrics = DerivedMetrics()
+    assert feed(metrics, [(0, readings(pressure=30.0))])['GV11'] == 0.0
+
+
+def test_gust_kept_until_exactly_one_window_old():
+    metrics = DerivedMetrics()
+    feed(metrics, [(0, readings(windSpeed=25.0)), (MINUTE, readings(windSpeed=5.0))])
+    assert feed(metrics, [(GUST_WINDOW - 1, readings(windSpeed=4.0))])['GV12'] == 25.0
+    # A gust exactly one window old has left the window
+    assert feed(metrics, [(GUST_WINDOW, readings(windSpeed=3.0))])['GV12'] == 5.0
+    assert feed(metrics, [(GUST_WINDOW + MINUTE, readings(windSpeed=2.0))])['GV12'] == 4.0
+
+
+def test_duplicate_and_older_check_ins_ignored():
+    metrics = DerivedMetrics()
+    assert metrics.update(100, readings(rainfall=0.0, windSpeed=5.0))
+    assert metrics.update(200, readings(rainfall=0.10, windSpeed=6.0))
+    assert not metrics.update(200, readings(rainfall=0.10, windSpeed=6.0))
+    assert not metrics.update(150, readings(rainfall=0.50, windSpeed=40.0))
+    drivers = dict(metrics.drivers())
+    assert drivers['GV9'] == 0.10
+    assert drivers['GV12'] == 6.0
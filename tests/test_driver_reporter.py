@@ -0,0 +1,155 @@
+import threading
+
+import udi_interface
+
+from acurite.DriverReporter import DriverReporter
+
+
+class SensorNode(udi_interface.Node):
+    drivers = [{'driver': 'CLITEMP', 'value': 0, 'uom': '17'},
+               {'driver': 'CLIHUM', 'value': 0, 'uom': '22'},
+               {'driver': 'GV1', 'value': 0, 'uom': '25'}]
+
+
+def test_parse_deadbands():
+    assert DriverReporter.parseDeadbands(' clitemp=0.1, CLIHUM=-1,,bad,GV1=x') == {'CLITEMP': 0.1, 'CLIHUM': 1.0}
+    assert DriverReporter.parseDeadbands(None) == {}
+
+
+def test_first_report_is_forced(poly):
+    reporter = DriverReporter()
+    node = SensorNode(poly, 'controller', '1', 'Node')
+    assert reporter.report(node, 'CLITEMP', 70.0)
+    assert node.reported == [('CLITEMP', 70.0)]
+    assert node.forced == ['CLITEMP']
+
+
+def test_deadband_suppresses_small_changes(poly):
+    reporter = DriverReporter({'CLITEMP': 0.5})
+    node = SensorNode(poly, 'controller', '1', 'Node')
+    reporter.report(node, 'CLITEMP', 70.0)
+    assert not reporter.report(node, 'CLITEMP', 70.4)
+    # Compared against the last value sent, so slow drift is still reported once it adds up
+    assert reporter.report(node, 'CLITEMP', 70.5)
+    assert node.reported == [('CLITEMP', 70.0), ('CLITEMP', 70.5)]
+    assert node.forced == ['CLITEMP']
+    assert (reporter.sentCount, reporter.suppressedCount) == (2, 1)
+
+
+def test_unchanged_values_suppressed_without_deadband(poly):
+    reporter = DriverReporter()
+    node = SensorNode(poly, 'controller', '1', 'Node')
+    reporter.report(node, 'CLIHUM', 45)
+    assert not reporter.report(node, 'CLIHUM', 45.0)
+    assert reporter.report(node, 'CLIHUM', 46)
+    reporter.report(node, 'GV1', 'Normal')
+    assert not reporter.report(node, 'GV1', 'Normal')
+    assert reporter.report(node, 'GV1', 'Low')
+
+
+def test_refresh_forces_every_driver_again(poly):
+    reporter = DriverReporter({'CLITEMP': 0.5})
+    node = SensorNode(poly, 'controller', '1', 'Node')
+    reporter.report(node, 'CLITEMP', 70.0)
+    reporter.refresh()
+    assert reporter.report(node, 'CLITEMP', 70.0)
+    assert node.forced == ['CLITEMP', 'CLITEMP']
+
+
+def test_forget_node_only_forgets_that_node(poly):
+    reporter = DriverReporter()
+    first = SensorNode(poly, 'controller', '1', 'First')
+    second = SensorNode(poly, 'controller', '2', 'Second')
+    reporter.report(first, 'CLITEMP', 70.0)
+    reporter.report(second, 'CLITEMP', 70.0)
+    reporter.forgetNode('1')
+    assert reporter.report(first, 'CLITEMP', 70.0)
+    assert not reporter.report(second, 'CLITEMP', 70.0)
+
+
+def test_batch_sends_one_status_message(poly):
+    reporter = DriverReporter()
+    first = SensorNode(poly, 'controller', '1', 'First')
+    second = SensorNode(poly, 'controller', '2', 'Second')
+    with reporter.batch():
+        reporter.report(first, 'CLITEMP', 70.5)
+        reporter.report(first, 'CLIHUM', 40)
+        reporter.report(second, 'CLITEMP', 68)
+        assert poly.messages == []
+    assert first.reported == [] and second.reported == []
+    assert poly.messages == [('status', {'set': [
+        {'address': '1', 'driver': 'CLITEMP', 'value': '70.5', 'uom': '17'},
+        {'address': '1', 'driver': 'CLIHUM', 'value': '40', 'uom': '22'},
+        {'address': '2', 'driver': 'CLITEMP', 'value': '68', 'uom': '17'}]})]
+    assert reporter.flushCount == 1
+
+
+def test_batch_sends_latest_value_once(poly):
+    reporter = DriverReporter()
+    node = SensorNode(poly, 'controller', '1', 'Node')
+    with reporter.batch():
+        reporter.report(node, 'CLITEMP', 70.0)
+        reporter.report(node, 'CLITEMP', 71.0)
+    assert poly.messages[0][1]['set'] == [{'address': '1', 'driver': 'CLITEMP', 'value': '71.0', 'uom': '17'}]
+
+
+def test_nested_batches_flush_once_at_the_outermost(poly):
+    reporter = DriverReporter()
+    first = SensorNode(poly, 'controller', '1', 'First')
+    second = SensorNode(poly, 'controller', '2', 'Second')
+    with reporter.batch():
+        with reporter.batch():
+            reporter.report(first, 'CLITEMP', 70.0)
+        assert poly.messages == []
+        with reporter.batch():
+            reporter.report(second, 'CLITEMP', 71.0)
+    assert len(poly.messages) == 1
+    assert len(poly.messages[0][1]['set']) == 2
+
+
+def test_empty_or_suppressed_batch_sends_nothing(poly):
+    reporter = DriverReporter()
+    node = SensorNode(poly, 'controller', '1', 'Node')
+    reporter.report(node, 'CLITEMP', 70.0)
+    with reporter.batch():
+        reporter.report(node, 'CLITEMP', 70.0)
+    assert poly.messages == []
+    assert reporter.flushCount == 0
+
+
+def test_batches_are_per_thread(poly):
+    reporter = DriverReporter()
+    batched = SensorNode(poly, 'controller', '1', 'Batched')
+    direct = SensorNode(poly, 'controller', '2', 'Direct')
+    with reporter.batch():
+        reporter.report(batched, 'CLITEMP', 70.0)
+        other = threading.Thread(target=reporter.report, args=(direct, 'CLITEMP', 65.0))
+        other.start()
+        other.join()
+        # The other thread is outside the batch, so its report went straight out
+        assert direct.reported == [('CLITEMP', 65.0)]
+    assert [entry['address'] for entry in poly.messages[0][1]['set']] == ['1']
+
+
+def test_failed_flush_falls_back_to_per_node_reports(poly):
+    def failingSend(message, messageType):
+        raise IOError('not connected')
+    poly.send = failingSend
+    reporter = DriverReporter()
+    node = SensorNode(poly, 'controller', '1', 'Node')
+    with reporter.batch():
+        reporter.report(node, 'CLITEMP', 70.0)
+    assert ('CLITEMP', 70.0) in node.reported
+
+
+def test_report_all_sends_each_driver_once_per_batch(poly):
+    reporter = DriverReporter()
+    node = SensorNode(poly, 'controller', '1', 'Node')
+    with reporter.batch():
+        reporter.report(node, 'CLITEMP', 70.0)
+        reporter.reportAll(node)
+    message, = [message for messageType, message in poly.messages if messageType == 'status']
+    assert sorted(entry['driver'] for entry in message['set']) == ['CLIHUM', 'CLITEMP', 'GV1']
+    assert node.reported == []
+    # Everything reportAll sent is known, so an unchanged value is not sent again
+    assert not reporter.report(node, 'CLIHUM', 0)
@@ -0,0 +1,67 @@
+import os
+from datetime import datetime, timezone
+
+from acurite.HistoryStore import COMPACTED_MARKER, HistoryStore
+
+DAY = 24 * 60 * 60
+START = datetime(2024, 3, 1, tzinfo=timezone.utc).timestamp()
+
+
+def seriesMtimes(store, partition):
+    paths = []
+    for dirPath, dirNames, fileNames in os.walk(os.path.join(store.rootDir, partition)):
+        paths.extend(os.path.join(dirPath, fileName) for fileName in fileNames if fileName.endswith('.bin'))
+    return {path: os.stat(path).st_mtime_ns for path in paths}
+
+
+def test_closed_partition_sorted_and_deduped(tmp_path):
+    store = HistoryStore(str(tmp_path), 7)
+    store.append('d1', START + 200, {'Temperature': 2.0})
+    store.append('d1', START + 100, {'Temperature': 1.0})
+    store.append('d1', START + 200, {'Temperature': 2.0})
+    store.compact(START + DAY)
+    assert store.query('d1', 'Temperature', START, START + DAY) == [(START + 100, 1.0), (START + 200, 2.0)]
+    assert os.path.exists(os.path.join(str(tmp_path), '20240301', COMPACTED_MARKER))
+
+
+def test_compacts_once_per_day(tmp_path, monkeypatch):
+    store = HistoryStore(str(tmp_path), 7)
+    store.append('d1', START + 100, {'Temperature': 1.0})
+    compacted = []
+    original = store.compactSeries
+    monkeypatch.setattr(store, 'compactSeries', lambda path: compacted.append(path) or original(path))
+    store.compact(START + DAY)
+    store.compact(START + DAY + 240)
+    store.compact(START + 2 * DAY)
+    assert len(compacted) == 1
+
+
+def test_marked_partitions_skipped_after_restart(tmp_path):
+    store = HistoryStore(str(tmp_path), 7)
+    store.append('d1', START + 100, {'Temperature': 1.0})
+    store.compact(START + DAY)
+    before = seriesMtimes(store, '20240301')
+
+    reopened = HistoryStore(str(tmp_path), 7)
+    assert '20240301' in reopened.compacted
+    reopened.compact(START + DAY + 60)
+    assert seriesMtimes(reopened, '20240301') == before
+
+
+def test_late_append_is_compacted_again(tmp_path):
+    store = HistoryStore(str(tmp_path), 7)
+    store.append('d1', START + 200, {'Temperature': 2.0})
+    store.compact(START + DAY)
+    store.append('d1', START + 100, {'Temperature': 1.0})
+    assert not os.path.exists(os.path.join(str(tmp_path), '20240301', COMPACTED_MARKER))
+    store.compact(START + DAY + 240)
+    assert store.query('d1', 'Temperature', START, START + DAY) == [(START + 100, 1.0), (START + 200, 2.0)]
+
+
+def test_expired_partitions_removed(tmp_path):
+    store = HistoryStore(str(tmp_path), 2)
+    store.append('d1', START, {'Temperature': 1.0})
+    store.append('d1', START + 3 * DAY, {'Temperature': 2.0})
+    store.compact(START + 3 * DAY)
+    assert sorted(os.listdir(str(tmp_path))) == ['20240304']
+    assert '20240301' not in store.compacted
@@ -0,0 +1,114 @@
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from acurite.Rtl433Source import LOCAL_HUB_ID, DailyCounter, Rtl433Decoder, Rtl433Source
+
+CAPTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'rtl433_capture.json')
+
+
+def readings(device):
+    return {sensor['sensor_code']: sensor['last_reading_value'] for sensor in device['sensors']}
+
+
+def captured():
+    with open(CAPTURE) as captureFile:
+        return [json.loads(line) for line in captureFile if len(line.strip()) > 0]
+
+
+def timestamp(day, hour=12):
+    return datetime(2024, 6, day, hour).timestamp()
+
+
+def replay(onDevice):
+    source = Rtl433Source('file:{}:0'.format(CAPTURE), onDevice)
+    source.start()
+    source.thread.join(5)
+    assert not source.running
+
+
+def test_metric_readings_converted_to_cloud_units():
+    decoder = Rtl433Decoder()
+    device = decoder.decode(captured()[0], timestamp(1))
+    assert device['address'] == 'r1001'
+    assert device['model_code'] == 'Atlas'
+    assert device['hub_id'] == LOCAL_HUB_ID
+    values = readings(device)
+    assert values['Temperature'] == 69.8
+    assert values['Wind Speed'] == 10.0
+    assert values['Humidity'] == 50
+    # 21C at 50% gives a dew point of about 10.2C
+    assert values['Dew Point'] == pytest.approx(50.3, abs=0.1)
+
+
+def test_atlas_messages_merge_into_one_device():
+    decoder = Rtl433Decoder()
+    first, other, second = captured()[:3]
+    decoder.decode(first, timestamp(1))
+    assert decoder.decode(other, timestamp(1)) is None
+    values = readings(decoder.decode(second, timestamp(1)))
+    # The second message carries no temperature, so the first one's is kept
+    assert values['Temperature'] == 69.8
+    assert values['UVIndex'] == 3
+    assert values['LightIntensity'] == 12000
+    # 25.4mm fell between the two messages; the first is only the counter baseline
+    assert values['Rainfall'] == 1.0
+
+
+def test_daily_counter_resets_at_midnight():
+    counter = DailyCounter()
+    day, nextDay = datetime(2024, 6, 1).date(), datetime(2024, 6, 2).date()
+    assert counter.update(100, day) == 0
+    assert counter.update(104, day) == 4
+    assert counter.update(106, nextDay) == 0
+    assert counter.update(107, nextDay) == 1
+
+
+def test_daily_counter_carries_total_over_wrap():
+    counter = DailyCounter()
+    day = datetime(2024, 6, 1).date()
+    counter.update(120, day)
+    assert counter.update(126, day) == 6
+    # Wrapped or reset: the 3 counted since then add to the 6 from before
+    assert counter.update(3, day) == 9
+    assert counter.update(5, day) == 11
+
+
+def test_closest_strike_tracked_for_the_day():
+    decoder = Rtl433Decoder()
+    messages = [message for message in captured() if message['model'] == 'Acurite-6045M']
+    devices = [dict(decoder.decode(message, timestamp(1))) for message in messages]
+    values = [readings(device) for device in devices]
+    assert [value['LightningStrikeCnt'] for value in values] == [0, 2, 3]
+    assert [value['LightningLastStrikeDist'] for value in values] == [10.0, 5.0, 10.0]
+    # No strikes counted yet on the first message, then the closest holds at 5mi
+    assert 'LightningClosestStrikeDist' not in values[0]
+    assert [value['LightningClosestStrikeDist'] for value in values[1:]] == [5.0, 5.0]
+    assert devices[-1]['battery_level'] == 'Low'
+
+    nextDay = readings(decoder.decode(messages[-1], timestamp(2)))
+    assert nextDay['LightningStrikeCnt'] == 0
+
+
+def test_file_source_replays_acurite_devices():
+    received = []
+    replay(received.append)
+    assert [device['address'] for device in received] == ['r1001', 'r1001', 'r2002', 'r2002', 'r2002']
+    assert readings(received[1])['Rainfall'] == 1.0
+    # Each update is a copy, so a later message never changes one already delivered
+    assert readings(received[2])['LightningStrikeCnt'] == 0
+    assert readings(received[4])['LightningStrikeCnt'] == 3
+
+
+def test_local_lightning_starts_storm_without_fetching(controller):
+    fetches = []
+    controller.stormMonitor.fetchHub = fetches.append
+    controller.stormMonitor.configure(True, 60)
+    replay(controller.processLocalDevice)
+    assert sorted(controller.nodeIndex) == ['r1001', 'r2002']
+    assert controller.stormMonitor.isActive()
+    assert list(controller.stormMonitor.bursts) == [(None, LOCAL_HUB_ID)]
+    assert controller.getDriver('GV1') == 1
+    assert fetches == []
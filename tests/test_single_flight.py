@@ -0,0 +1,88 @@
+import threading
+import time
+
+from acurite.Metrics import METRICS
+from acurite.SingleFlight import COALESCE, QUEUE_ONE, SKIP, SingleFlight
+
+
+def overruns(policy):
+    return METRICS.counters.get(('acurite_poll_overruns', (('policy', policy),)), 0)
+
+
+def test_skip_turns_callers_away():
+    flight = SingleFlight(SKIP)
+    before = overruns(SKIP)
+    token = flight.begin('shortPoll')
+    assert token is not None
+    assert flight.begin('Query') is None
+    assert overruns(SKIP) - before == 1
+    assert not flight.end(token)
+    assert not flight.inFlight
+    assert flight.begin('shortPoll') is not None
+
+
+def test_coalesce_waits_for_the_flight_in_the_air():
+    flight = SingleFlight(COALESCE)
+    token = flight.begin('shortPoll')
+    waited = []
+    waiter = threading.Thread(target=lambda: waited.append(flight.begin('Query', wait=True)))
+    waiter.start()
+    waiter.join(0.2)
+    assert waiter.is_alive()
+    assert not flight.end(token)
+    waiter.join(5)
+    # The waiter shared the landed fetch rather than starting its own
+    assert waited == [None]
+    assert not flight.inFlight
+
+
+def test_coalesce_without_wait_returns_at_once():
+    flight = SingleFlight(COALESCE)
+    flight.begin('shortPoll')
+    assert flight.begin('Query') is None
+
+
+def test_queue_one_runs_a_single_extra_fetch():
+    flight = SingleFlight(QUEUE_ONE)
+    token = flight.begin('shortPoll')
+    for caller in ('Query', 'Discover', 'shortPoll'):
+        assert flight.begin(caller) is None
+    assert flight.end(token)
+    assert flight.inFlight
+    assert not flight.end(token)
+    assert not flight.inFlight
+    assert flight.flights == 1
+
+
+def test_stuck_flight_replaced_after_timeout():
+    flight = SingleFlight(SKIP, flightTimeout=0.05)
+    stuck = flight.begin('shortPoll')
+    assert flight.begin('Query') is None
+    time.sleep(0.1)
+    replacement = flight.begin('Query')
+    assert replacement not in (None, stuck)
+    assert flight.inFlight
+
+
+def test_coalesce_wait_gives_up_at_timeout():
+    flight = SingleFlight(COALESCE, flightTimeout=0.1)
+    flight.begin('shortPoll')
+    started = time.monotonic()
+    assert flight.begin('Query', wait=True) is None
+    assert time.monotonic() - started < 5
+
+
+def test_late_end_of_replaced_flight_is_ignored():
+    flight = SingleFlight(QUEUE_ONE, flightTimeout=0.05)
+    stuck = flight.begin('shortPoll')
+    time.sleep(0.1)
+    replacement = flight.begin('Query')
+    assert flight.begin('Discover') is None
+
+    # The stuck owner finally finishes; neither the replacement nor its queued fetch may be touched
+    assert not flight.end(stuck)
+    assert flight.inFlight
+    assert flight.queued
+    assert flight.end(replacement)
+    assert not flight.end(replacement)
+    assert not flight.inFlight
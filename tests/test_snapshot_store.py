@@ -0,0 +1,120 @@
+import json
+import threading
+
+from acurite.ReplayTransport import syntheticDevice
+from acurite.SnapshotStore import SnapshotStore
+
+
+def device(address, value):
+    return {'id': address, 'address': address, 'name': 'Device {}'.format(address),
+            'sensors': [{'sensor_code': 'Temperature', 'last_reading_value': value}]}
+
+
+def writeSnapshot(path, devices):
+    with open(path, 'w') as snapshotFile:
+        json.dump({'saved_at': 0, 'devices': devices}, snapshotFile)
+
+
+def savedAddresses(path):
+    with open(path) as snapshotFile:
+        return sorted(saved['address'] for saved in json.load(snapshotFile)['devices'])
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / 'snapshot.json')
+    store = SnapshotStore(path)
+    store.update([dict(device('1', 70.0), unchanged=False)])
+    store.save()
+
+    loaded = SnapshotStore(path).load()
+    assert [(saved['address'], saved['cached']) for saved in loaded] == [('1', True)]
+    assert 'unchanged' not in loaded[0]
+
+
+def test_load_keeps_newer_devices_in_memory(tmp_path):
+    path = str(tmp_path / 'snapshot.json')
+    writeSnapshot(path, [device('1', 60.0), device('2', 61.0)])
+    store = SnapshotStore(path)
+    store.update([device('1', 75.0)])
+
+    added = store.load()
+    assert [saved['address'] for saved in added] == ['2']
+    assert store.get('1')['sensors'][0]['last_reading_value'] == 75.0
+    assert sorted(saved['address'] for saved in store.cachedDevices()) == ['1', '2']
+
+
+def test_unreadable_snapshot_loads_nothing(tmp_path):
+    path = tmp_path / 'snapshot.json'
+    path.write_text('{not json')
+    assert SnapshotStore(str(path)).load() == []
+
+
+def test_new_snapshot_file_is_merged_not_overwritten(controller, tmp_path):
+    path = str(tmp_path / 'custom.json')
+    writeSnapshot(path, [device('1', 60.0), device('2', 61.0)])
+    controller.Parameters['snapshot_file'] = path
+    controller.configureSnapshot()
+    assert savedAddresses(path) == ['1', '2']
+
+    controller.snapshotStore.update([device('3', 62.0)])
+    controller.snapshotStore.save()
+    assert savedAddresses(path) == ['1', '2', '3']
+
+
+def snapshotFleet(path, count):
+    devices = [dict(syntheticDevice(900000 + index), address=str(900000 + index), hub_id='synthetic1', account=1)
+               for index in range(count)]
+    writeSnapshot(path, devices)
+    return devices
+
+
+def test_restore_creates_cached_nodes(controller, tmp_path):
+    snapshotFleet(str(tmp_path / 'snapshot.json'), 3)
+    controller.restoreSnapshot()
+    assert sorted(controller.nodeIndex) == ['900000', '900001', '900002']
+    assert all(node.stale for node in controller.nodeIndex.values())
+    assert controller.populated
+
+
+def test_restore_skipped_after_live_fetch(controller, tmp_path):
+    snapshotFleet(str(tmp_path / 'snapshot.json'), 3)
+    controller.populated = True
+    controller.restoreSnapshot()
+    assert controller.nodeIndex == {}
+
+
+def test_restore_waits_for_running_apply(controller, tmp_path):
+    snapshotFleet(str(tmp_path / 'snapshot.json'), 2)
+    with controller.applyLock:
+        restore = threading.Thread(target=controller.restoreSnapshot)
+        restore.start()
+        restore.join(0.2)
+        assert restore.is_alive()
+        assert controller.nodeIndex == {}
+    restore.join(5)
+    assert len(controller.nodeIndex) == 2
+
+
+def test_pruned_devices_leave_the_snapshot(controller, tmp_path):
+    path = str(tmp_path / 'snapshot.json')
+    fleet = snapshotFleet(path, 3)
+    controller.restoreSnapshot()
+
+    controller.syncNodes(fleet[:2], False)
+    assert sorted(controller.nodeIndex) == ['900000', '900001']
+    assert savedAddresses(path) == ['900000', '900001']
+
+    # A restart restores only the devices still reported
+    controller.nodeIndex = {}
+    controller.populated = False
+    controller.snapshotStore = SnapshotStore(path)
+    controller.restoreSnapshot()
+    assert sorted(controller.nodeIndex) == ['900000', '900001']
+
+
+def test_partial_sync_keeps_snapshot(controller, tmp_path):
+    path = str(tmp_path / 'snapshot.json')
+    fleet = snapshotFleet(path, 3)
+    controller.restoreSnapshot()
+    controller.syncNodes(fleet[:1], True)
+    assert savedAddresses(path) == ['900000', '900001', '900002']
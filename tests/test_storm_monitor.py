@@ -0,0 +1,106 @@
+import threading
+
+import pytest
+
+from acurite.StormMonitor import CallBudget, StormMonitor
+
+HUB = (1, 'hub1')
+
+
+def lightning(strikeCount, closestStrike=0):
+    return {'address': '500', 'account': HUB[0], 'hub_id': HUB[1],
+            'sensors': [{'sensor_code': 'LightningStrikeCnt', 'last_reading_value': strikeCount},
+                        {'sensor_code': 'LightningClosestStrikeDist', 'last_reading_value': closestStrike}]}
+
+
+class Recorder():
+    def __init__(self):
+        self.fetches = []
+        self.changes = []
+        self.ended = threading.Event()
+
+    def fetchHub(self, hubKey):
+        self.fetches.append(hubKey)
+
+    def onChange(self, active):
+        self.changes.append(active)
+        if not active:
+            self.ended.set()
+
+
+@pytest.fixture
+def recorder():
+    return Recorder()
+
+
+def startBurst(monitor, now=0.0):
+    monitor.observe([lightning(1)], now)
+    return monitor.observe([lightning(2)], now)
+
+
+def test_strike_count_rise_starts_burst(recorder):
+    monitor = StormMonitor(recorder.fetchHub, recorder.onChange)
+    monitor.enabled = True
+    assert monitor.observe([lightning(1)], 0.0) == []
+    assert monitor.observe([lightning(2)], 10.0) == [HUB]
+    assert monitor.isActive()
+    assert recorder.changes == [True]
+
+
+def test_midnight_reset_and_farther_strike_do_not_start_burst(recorder):
+    monitor = StormMonitor(recorder.fetchHub, recorder.onChange)
+    monitor.enabled = True
+    monitor.observe([lightning(5, 4)], 0.0)
+    assert monitor.observe([lightning(0, 0)], 10.0) == []
+    assert monitor.observe([lightning(0, 0)], 20.0) == []
+    assert not monitor.isActive()
+
+
+def test_exhausted_budget_waits_no_longer_than_quiet_period(recorder):
+    monitor = StormMonitor(recorder.fetchHub, recorder.onChange, burstInterval=20, quietPeriod=900)
+    monitor.enabled = True
+    monitor.budget = CallBudget(1)
+    startBurst(monitor)
+    assert monitor.budget.tryAcquire(0.0)
+    # The budget pushes the hub out an hour, but the burst goes quiet long before that
+    monitor.bursts[HUB]['nextFetch'] = monitor.budget.nextAvailable(20.0)
+    assert monitor.nextWait(20.0) == 880.0
+    assert monitor.nextDue(900.0) == ([], True)
+    assert monitor.nextWait(900.0) is None
+
+
+def test_burst_ends_when_budget_exhausted(recorder):
+    monitor = StormMonitor(recorder.fetchHub, recorder.onChange, burstInterval=0.05, quietPeriod=0.5)
+    monitor.configure(True, 1)
+    try:
+        startBurst(monitor, None)
+        assert recorder.ended.wait(5)
+    finally:
+        monitor.stop()
+    assert recorder.fetches == [HUB]
+    assert recorder.changes == [True, False]
+    assert not monitor.isActive()
+
+
+def test_burst_fetches_back_off(recorder):
+    monitor = StormMonitor(recorder.fetchHub, recorder.onChange, burstInterval=0.05, quietPeriod=0.6)
+    monitor.configure(True, 60)
+    try:
+        startBurst(monitor, None)
+        assert recorder.ended.wait(5)
+    finally:
+        monitor.stop()
+    # Fetched at 0.05, 0.1, 0.2 and 0.4s; the next one would be at 0.8s, after the burst went quiet
+    assert len(recorder.fetches) == 4
+
+
+def test_disabling_ends_active_burst(recorder):
+    monitor = StormMonitor(recorder.fetchHub, recorder.onChange, burstInterval=60)
+    monitor.configure(True, 60)
+    try:
+        startBurst(monitor, None)
+        monitor.configure(False, 60)
+    finally:
+        monitor.stop()
+    assert recorder.changes == [True, False]
+    assert not monitor.isActive()
@@ -0,0 +1,58 @@
+import pytest
+import requests
+
+from acurite.AcuriteTransport import AcuriteTransport
+from acurite.ReplayTransport import writeSyntheticFleet
+from stubserver import StubServer
+
+
+@pytest.fixture
+def server(tmp_path):
+    writeSyntheticFleet(str(tmp_path), 3)
+    with StubServer(str(tmp_path)) as stub:
+        yield stub
+
+
+@pytest.fixture
+def transport():
+    transport = AcuriteTransport(connectTimeout=1.0, readTimeout=1.0, maxRetries=2)
+    transport.backoffDelay = lambda attempt: 0
+    yield transport
+    transport.close()
+
+
+def hubsUrl(server):
+    return server.url + '/accounts/1/dashboard/hubs'
+
+
+def test_reuses_connection(server, transport):
+    for _ in range(5):
+        assert transport.get(hubsUrl(server)).status_code == 200
+    assert len(server.requests) == 5
+    assert server.connections == 1
+
+
+def test_read_timeout_raises_after_retries(server, transport):
+    server.delay = 0.5
+    transport.configure(1.0, 0.1, 1)
+    with pytest.raises(requests.Timeout):
+        transport.get(hubsUrl(server))
+    assert len(server.requests) == 2
+
+
+def test_retries_server_errors(server, transport):
+    server.failures['hubs.json'] = 2
+    resp = transport.get(hubsUrl(server))
+    assert resp.status_code == 200
+    assert len(server.requests) == 3
+
+
+def test_returns_last_server_error_when_retries_run_out(server, transport):
+    server.failures['hubs.json'] = 5
+    assert transport.get(hubsUrl(server)).status_code == 503
+    assert len(server.requests) == 3
+
+
+def test_client_errors_are_not_retried(server, transport):
+    assert transport.get(server.url + '/unknown').status_code == 404
+    assert len(server.requests) == 1
@@ -9,12 +9,12 @@ import sys
 LOGGER = udi_interface.LOGGER
 LOG_HANDLER = udi_interface.LOG_HANDLER;
 
-from nodes import AcuriteController, AcuriteAtlasNode, AcuriteDeviceNode
+from nodes import AcuriteController, AcuriteNode
 
 if __name__ == "__main__":
     try:
         LOGGER.debug("Staring Poly Interface")
-        polyglot = udi_interface.Interface([AcuriteController, AcuriteDeviceNode, AcuriteAtlasNode])
+        polyglot = udi_interface.Interface([AcuriteController, AcuriteNode])
         polyglot.start()
         control = AcuriteController(polyglot, 'controller', 'controller', 'Acurite Hub')
         polyglot.runForever()